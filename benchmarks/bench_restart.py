@@ -0,0 +1,55 @@
+"""Restart latency vs. stats history size.
+
+Times PenaltyShootout.reset_game (what "Play Again" runs) against game
+logs of increasing length. With the lazily loaded stats repository the
+numbers should stay flat.
+
+    python benchmarks/bench_restart.py
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import penalty_shootout  # noqa: E402
+
+HISTORY_SIZES = [0, 1000, 10000, 100000]
+RESTARTS = 200
+
+GAME = {"date": "2025-01-01 12:00:00", "difficulty": "normal", "player_score": 4,
+        "cpu_score": 3, "player_kicks": 5, "cpu_kicks": 5, "sudden_death": False,
+        "forfeited": False, "player_accuracy": 0.8}
+
+
+def write_history(path, count):
+    line = json.dumps(GAME, separators=(",", ":")) + "\n"
+    with open(path, "w") as f:
+        f.write(line * count)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        os.symlink(os.path.join(ROOT, "assets"), "assets")
+        for size in HISTORY_SIZES:
+            write_history("game_stats.jsonl", size)
+            if os.path.exists("game_stats_summary.json"):
+                os.remove("game_stats_summary.json")
+
+            game = penalty_shootout.PenaltyShootout()
+            start = time.perf_counter()
+            for _ in range(RESTARTS):
+                game.reset_game()
+            per_restart = (time.perf_counter() - start) / RESTARTS
+            print(f"history {size:>7} games: reset_game {per_restart * 1e6:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+"""Headless benchmark suite for the rendering and simulation hot paths.
+
+Times startup (cold and with the processed-sprite cache), every draw_*
+method for one frame, animate_ball trajectories across power levels and
+full match simulations. Results are written as JSON and compared with a
+stored baseline; anything slower than the threshold is flagged and the
+exit status is 1.
+
+Absolute times drift by a quarter or more between runs on a shared
+machine, so the suite is its own reference. Every sweep times one round
+of each benchmark, which spreads a benchmark's rounds over the whole run
+instead of bunching them into one slow spell. The median change of all
+benchmarks from the baseline is the machine factor, the part that is the
+machine rather than the code. A benchmark is flagged when it is over the
+threshold both in raw time and divided by the machine factor, and its
+interquartile range no longer overlaps the baseline's. A slowdown shared
+by most of the suite looks like a slower machine and is not flagged; the
+machine factor is printed so it shows. Recording a baseline and checking
+against one run the same measurement, and play_match times are per call
+of MATCHES matches.
+
+    python benchmarks/bench_suite.py                      # compare with baseline.json
+    python benchmarks/bench_suite.py --output now.json    # also save the results
+    python benchmarks/bench_suite.py --save-baseline      # record a new baseline
+    python benchmarks/bench_suite.py --filter draw_       # only matching benchmarks
+
+Baselines are machine specific; record one on the machine you compare
+on, from the tree it is committed with.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import penalty_shootout  # noqa: E402
+from penalty_shootout import PenaltyShootout, MENU, CHOOSE_SIDE, PLAYING, PAUSED, GAME_OVER, STATS, SETTINGS  # noqa: E402
+from shootout_engine import ShootoutEngine, DIFFICULTY_SETTINGS  # noqa: E402
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+THRESHOLD = 0.25    # flag benchmarks more than 25% slower than the baseline, machine factor aside
+REPEAT = 25         # sweeps over all benchmarks, one timed round of each per sweep
+TARGET_ROUND = 0.01  # seconds per round
+MIN_REFERENCE = 5   # benchmarks needed to estimate the machine factor; fewer are not gated
+POWER_LEVELS = [0.0, 0.25, 0.5, 0.75, 1.0]
+MATCHES = 200       # matches per engine simulation call
+SEED = 0
+
+
+def calls_per_round(func):
+    """Calls of func() that take about TARGET_ROUND, so short functions are not lost in timer noise"""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= TARGET_ROUND / 10 or number >= 1 << 20:
+            break
+        number *= 4
+    return max(1, int(number * TARGET_ROUND / max(elapsed, 1e-9)))
+
+
+def time_round(func, number):
+    """Time per call of func() in microseconds over one round of `number` calls"""
+    # As timeit does: a collection is set off by whatever ran before, not by func
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        return (time.perf_counter() - start) / number * 1e6
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def new_game():
+    game = PenaltyShootout(seed=SEED)
+    game.settings["record_replays"] = False
+    # Nothing is saved here; stop the background settings writer straight away
+    game.settings_writer.close()
+    return game
+
+
+def bench_startup(benchmarks):
+    def cold():
+        # Without the processed-sprite cache the ball is masked and scaled again
+        if os.path.isdir(penalty_shootout.CACHE_DIR):
+            for name in os.listdir(penalty_shootout.CACHE_DIR):
+                os.remove(os.path.join(penalty_shootout.CACHE_DIR, name))
+        new_game()
+
+    benchmarks["startup[cold]"] = cold
+    benchmarks["startup[cached]"] = new_game
+
+
+def per_frame(game, draw):
+    """draw() as one frame; the dirty-rect list is reset as present() would"""
+    def frame():
+        draw()
+        game.dirty_rects.clear()
+    return frame
+
+
+def playing_game(phase):
+    """A game mid-match in the given phase"""
+    game = new_game()
+    game.state = PLAYING
+    game.reset_game()
+    if phase == "power_aim":
+        game.aiming = True
+        game.aim_direction = "left"
+        game.current_phase = "power_aim"
+        game.fill_level = 0.6
+    elif phase == "ball_moving":
+        game.user_shot = "right"
+        game.selected_power = 0.5
+        game.ball_target = game.get_shot_target("right")
+        game.ball_moving = True
+        game.ball_pos = [700, 300]
+    elif phase == "player_save":
+        game.current_phase = "player_save"
+        game.computer_shot = "center"
+    return game
+
+
+def bench_draw(benchmarks):
+    # Every benchmark keeps its own game: the rounds of all of them are interleaved
+    for state, method in [(MENU, "draw_menu"), (CHOOSE_SIDE, "draw_choose_side"),
+                          (GAME_OVER, "draw_game_over"), (STATS, "draw_stats_screen"),
+                          (SETTINGS, "draw_settings_screen")]:
+        game = new_game()
+        game.state = state
+        benchmarks[method] = per_frame(game, getattr(game, method))
+
+    for phase in ["player_shoot", "power_aim", "ball_moving", "player_save"]:
+        game = playing_game(phase)
+        benchmarks[f"draw_game[{phase}]"] = per_frame(game, game.draw_game)
+    game = playing_game("player_save")
+    game.state = PAUSED
+    benchmarks["draw_game[paused]"] = per_frame(game, game.draw_game)
+
+    # Individual pieces of the game screen
+    game = playing_game("power_aim")
+    for method in ["draw_ball", "draw_scoreboard", "draw_turn_indicator", "draw_power_meter",
+                   "draw_sudden_death_banner", "draw_hamburger", "draw_goal"]:
+        benchmarks[method] = per_frame(game, getattr(game, method))
+    benchmarks["draw_goalkeeper"] = per_frame(game, lambda: game.draw_goalkeeper("left"))
+    benchmarks["draw_button"] = per_frame(game, lambda: game.draw_button(
+        game.buttons["left"], "Left", penalty_shootout.GRAY, penalty_shootout.LIGHT_GRAY))
+    benchmarks["present"] = game.present
+
+
+def bench_animate_ball(benchmarks):
+    for power in POWER_LEVELS:
+        game = playing_game("player_shoot")
+
+        def trajectory(game=game, power=power):
+            # One full shot: from the spot until the ball stops and the kick is resolved
+            game.engine.reset()
+            game.ball_pos = [512, 650]
+            game.current_phase = "player_shoot"
+            game.user_shot = "left"
+            game.cpu_keeper_guess = "right"
+            game.selected_power = power
+            game.ball_target = game.get_shot_target("left")
+            game.ball_moving = True
+            while game.ball_moving:
+                game.animate_ball()
+            game.goal_animation = game.save_animation = False
+
+        benchmarks[f"animate_ball[power={power}]"] = trajectory
+
+
+def bench_simulation(benchmarks):
+    for difficulty in DIFFICULTY_SETTINGS:
+        engine = ShootoutEngine(difficulty, rng=random.Random(SEED))
+
+        def matches(engine=engine):
+            # Same matches every round
+            engine.rng.seed(SEED)
+            for _ in range(MATCHES):
+                engine.reset()
+                engine.play_match()
+
+        benchmarks[f"play_match[{difficulty}]"] = matches
+
+    try:
+        from simulation import simulate_matches
+    except ImportError:
+        return  # NumPy not installed
+    settings = DIFFICULTY_SETTINGS["normal"]
+    benchmarks["simulate_matches[10k]"] = lambda: simulate_matches(
+        10000, settings["cpu_guess_accuracy"], settings["player_guess_accuracy"], seed=SEED)
+
+
+GROUPS = [("startup", bench_startup), ("draw", bench_draw),
+          ("animate_ball", bench_animate_ball), ("simulation", bench_simulation)]
+
+
+def machine_factor(results, baseline):
+    """Median change from the baseline over all benchmarks (how much slower the machine is), or None"""
+    changes = [timing["median_us"] / baseline[name]["median_us"]
+               for name, timing in results.items() if "low_us" in baseline.get(name, {})]
+    return statistics.median(changes) if len(changes) >= MIN_REFERENCE else None
+
+
+def slowdown(timing, base, factor):
+    """Change from the baseline that neither the raw times nor the machine factor explain
+
+    Pure-Python and blit-heavy benchmarks do not always speed up and slow
+    down together, so a benchmark only counts as slower when it is slower
+    both in absolute terms and relative to the rest of the suite.
+    """
+    return min(timing["median_us"], timing["median_us"] / factor) / base["median_us"] - 1.0
+
+
+def is_regression(timing, base, factor, threshold):
+    # Slower by more than the threshold, and the interquartile ranges no longer overlap
+    return (slowdown(timing, base, factor) > threshold
+            and timing["low_us"] / max(factor, 1.0) > base["high_us"])
+
+
+def compare(results, baseline, threshold):
+    """Print median times next to the baseline's; returns the names that regressed"""
+    factor = machine_factor(results, baseline)
+    gate = factor is not None
+    if not gate:
+        factor = 1.0  # raw changes only; they are too noisy to gate on
+    regressions = []
+    print(f"{'benchmark':34} {'median':>12} {'baseline':>12} {'change':>8}")
+    for name, timing in results.items():
+        base = baseline.get(name)
+        line = f"{name:34} {timing['median_us']:10.2f}us"
+        if base and "low_us" in base:
+            change = slowdown(timing, base, factor)
+            flag = "  REGRESSION" if gate and is_regression(timing, base, factor, threshold) else ""
+            line += f" {base['median_us']:10.2f}us {change * 100:+7.1f}%{flag}"
+            if flag:
+                regressions.append(name)
+        print(line)
+    if gate:
+        print(f"Machine factor {factor:.3f}")
+    elif baseline:
+        print(f"Fewer than {MIN_REFERENCE} benchmarks to compare: changes are raw times, not gated")
+    return regressions
+
+
+def run_suite(wanted, repeat=REPEAT):
+    """Time the wanted benchmarks; returns name → median and quartile times and calls per round
+
+    Each of the `repeat` sweeps takes one round of every benchmark, so a
+    benchmark's rounds are spread over the whole run rather than bunched
+    into one slow spell.
+    """
+    benchmarks = {}
+    for group, bench in GROUPS:
+        bench(benchmarks)
+    benchmarks = {name: func for name, func in benchmarks.items() if wanted(name)}
+    calls = {name: calls_per_round(func) for name, func in benchmarks.items()}
+
+    times = {name: [] for name in benchmarks}
+    for _ in range(repeat):
+        for name, func in benchmarks.items():
+            times[name].append(time_round(func, calls[name]))
+
+    results = {}
+    for name in benchmarks:
+        low, median, high = statistics.quantiles(times[name], n=4)
+        results[name] = {"median_us": median, "low_us": low, "high_us": high, "calls": calls[name]}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Penalty shootout benchmark suite")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline JSON to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="relative slowdown that counts as a regression")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this")
+    args = parser.parse_args()
+
+    baseline = {}
+    if not args.save_baseline:
+        try:
+            with open(args.baseline) as f:
+                baseline = json.load(f)["results"]
+        except FileNotFoundError:
+            pass
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        os.symlink(os.path.join(ROOT, "assets"), "assets")
+        results = run_suite(lambda name: args.filter in name)
+
+    report = {
+        "meta": {"python": platform.python_version(), "machine": platform.machine(),
+                 "platform": platform.platform(), "date": time.strftime("%Y-%m-%d %H:%M:%S")},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        baseline = results
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {args.threshold * 100:.0f}%: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Per-frame timing of the game loop.
+
+FrameProfiler wraps the game's methods so every call adds its exclusive
+time (its own time, minus the time of timed methods it calls) to the
+current frame. The last FRAME_HISTORY frames are kept for the on-screen
+overlay and can be exported as CSV (one row per frame) or JSON (summary).
+"""
+import csv
+import json
+import time
+from collections import deque
+
+FRAME_HISTORY = 600  # frames kept (10 s at 60 FPS)
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty sequence"""
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100.0 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class FrameProfiler:
+    """Collects an exclusive time split for each frame"""
+
+    def __init__(self, history=FRAME_HISTORY):
+        self.frames = deque(maxlen=history)  # (work_ms, clock_ms, {section: ms})
+        self.sections = {}                   # section times of the frame in progress
+        self.stack = []                      # [start, child_time] of active timed calls
+        self.frame_start = None
+        self.work_ms = None
+        self.dropped = 0
+        self.total_frames = 0
+        self.latencies = deque(maxlen=history)  # input-to-lock latency of recent power locks (ms)
+
+    def timed(self, name, func):
+        """Wrap `func` so its calls count towards section `name`"""
+        def wrapper(*args, **kwargs):
+            self.stack.append([time.perf_counter(), 0.0])
+            try:
+                return func(*args, **kwargs)
+            finally:
+                start, children = self.stack.pop()
+                elapsed = time.perf_counter() - start
+                self.sections[name] = self.sections.get(name, 0.0) + (elapsed - children) * 1000.0
+                if self.stack:
+                    self.stack[-1][1] += elapsed
+        return wrapper
+
+    def instrument(self, obj, names):
+        """Replace obj's methods `names` with timed versions"""
+        for name in names:
+            setattr(obj, name, self.timed(name, getattr(obj, name)))
+
+    def begin_frame(self):
+        self.frame_start = time.perf_counter()
+        self.work_ms = None
+        self.sections = {}
+
+    def end_work(self):
+        """Mark the frame's work as done (call before the frame-rate limiter sleeps)"""
+        if self.frame_start is not None:
+            self.work_ms = (time.perf_counter() - self.frame_start) * 1000.0
+
+    def end_frame(self, clock, budget_ms):
+        """Close the frame; `clock` is the pygame Clock that was just ticked"""
+        if self.frame_start is None or self.work_ms is None:
+            return
+        work_ms = self.work_ms
+        # Whatever the timed methods did not cover (loop overhead)
+        self.sections["other"] = max(0.0, work_ms - sum(self.sections.values()))
+        self.frames.append((work_ms, clock.get_time(), self.sections))
+        self.total_frames += 1
+        # A frame that needed more than its budget made the next one late
+        if clock.get_rawtime() > budget_ms:
+            self.dropped += 1
+        self.frame_start = None
+
+    def record_latency(self, ms):
+        self.latencies.append(ms)
+
+    def summary(self):
+        """Frame-time percentiles and mean/p95 per section over the kept frames"""
+        if not self.frames:
+            return {"frames": 0, "dropped": self.dropped, "frame_ms": {}, "sections": {}}
+        work = [frame[0] for frame in self.frames]
+        names = sorted({name for frame in self.frames for name in frame[2]})
+        sections = {}
+        for name in names:
+            values = [frame[2].get(name, 0.0) for frame in self.frames]
+            sections[name] = {"mean_ms": sum(values) / len(values), "p95_ms": percentile(values, 95)}
+        return {
+            "frames": len(self.frames),
+            "total_frames": self.total_frames,
+            "dropped": self.dropped,
+            "frame_ms": {f"p{pct}": percentile(work, pct) for pct in PERCENTILES},
+            "sections": sections,
+            "input_latency_ms": {f"p{pct}": percentile(self.latencies, pct) for pct in PERCENTILES}
+            if self.latencies else {},
+        }
+
+    def overlay_lines(self, max_sections=8):
+        """(label, value) rows for the on-screen overlay"""
+        stats = self.summary()
+        if not stats["frames"]:
+            return [("Collecting frame timings...", "")]
+        frame_ms = stats["frame_ms"]
+        lines = [(f"Frame p50 {frame_ms['p50']:.2f}  p95 {frame_ms['p95']:.2f}  p99 {frame_ms['p99']:.2f} ms", ""),
+                 (f"Dropped {stats['dropped']} of {stats['total_frames']}", "")]
+        if stats["input_latency_ms"]:
+            latency = stats["input_latency_ms"]
+            lines.append((f"Input to lock p50 {latency['p50']:.2f}  p95 {latency['p95']:.2f} ms", ""))
+        slowest = sorted(stats["sections"].items(), key=lambda item: -item[1]["mean_ms"])
+        for name, values in slowest[:max_sections]:
+            lines.append((name, f"{values['mean_ms']:.3f} ms"))
+        return lines
+
+    def export(self, path):
+        """Write per-frame rows (.csv) or the summary (anything else, as JSON)"""
+        if path.endswith(".csv"):
+            names = sorted({name for frame in self.frames for name in frame[2]})
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["frame", "work_ms", "clock_ms"] + names)
+                for index, (work_ms, clock_ms, sections) in enumerate(self.frames):
+                    writer.writerow([index, f"{work_ms:.4f}", clock_ms]
+                                    + [f"{sections.get(name, 0.0):.4f}" for name in names])
+        else:
+            with open(path, "w") as f:
+                json.dump(self.summary(), f, indent=2)
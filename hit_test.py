@@ -0,0 +1,35 @@
+"""Click hit-testing for one screen.
+
+HitRegistry buckets clickable rects into a coarse grid once, so a click
+only tests the few targets in its own cell instead of every button on the
+screen. The rects are the same objects the draw code uses, so drawing and
+hit-testing cannot drift apart.
+"""
+
+CELL_SIZE = 64  # grid cell size in pixels
+
+
+class HitRegistry:
+    """Clickable regions of one screen and the action each one triggers"""
+
+    def __init__(self, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}  # (column, row) → [(rect, action), ...] in registration order
+
+    def add(self, rect, action):
+        """Register `action` (called with no arguments) for clicks inside `rect`"""
+        size = self.cell_size
+        for column in range(rect.left // size, (rect.right - 1) // size + 1):
+            for row in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                self.cells.setdefault((column, row), []).append((rect, action))
+
+    def hit(self, pos):
+        """Action of the topmost (last registered) target under `pos`, or None"""
+        targets = self.cells.get((pos[0] // self.cell_size, pos[1] // self.cell_size), ())
+        for rect, action in reversed(targets):
+            if rect.collidepoint(pos):
+                return action
+        return None
+
+    def clear(self):
+        self.cells.clear()
@@ -0,0 +1,98 @@
+"""Frame-by-frame input recording for deterministic replays.
+
+Together with the session seed, the inputs each frame saw and the number
+of simulation steps it ran are all the game needs to play a session again
+exactly, frame for frame. That makes bugs reproducible and gives
+performance comparisons an identical workload on every run.
+
+    header  <4sBQI   magic, version, session seed, settings length
+            ...      the settings in effect, as JSON
+    frame   <HBhhH   simulation steps, event count, mouse x, mouse y,
+                     input lead (1/10 ms; see PenaltyShootout.locked_power)
+    event   <BIhh    kind, key/button, x, y (or 0, wheel y for MOUSEWHEEL)
+"""
+import json
+import struct
+
+import pygame
+
+MAGIC = b"PSIN"
+VERSION = 3
+HEADER = struct.Struct("<4sBQI")
+FRAME = struct.Struct("<HBhhH")
+LEAD_UNITS = 10000  # input lead is stored in 1/10 ms
+EVENT = struct.Struct("<BIhh")  # pygame 2 key codes (F-keys, arrows) need 32 bits
+
+# Only events that change game state are recorded
+EVENT_KINDS = [pygame.QUIT, pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN, pygame.MOUSEWHEEL]
+
+
+def encode_event(event):
+    """Fixed-width record for an event, or None if it does not affect the game"""
+    if event.type == pygame.KEYDOWN:
+        return EVENT.pack(1, event.key, 0, 0)
+    if event.type == pygame.MOUSEBUTTONDOWN:
+        return EVENT.pack(2, event.button, *event.pos)
+    if event.type == pygame.MOUSEWHEEL:
+        return EVENT.pack(3, 0, event.x, event.y)
+    if event.type == pygame.QUIT:
+        return EVENT.pack(0, 0, 0, 0)
+    return None
+
+
+def decode_event(record):
+    kind, code, x, y = EVENT.unpack(record)
+    event_type = EVENT_KINDS[kind]
+    if event_type == pygame.KEYDOWN:
+        return pygame.event.Event(event_type, key=code)
+    if event_type == pygame.MOUSEBUTTONDOWN:
+        return pygame.event.Event(event_type, button=code, pos=(x, y))
+    if event_type == pygame.MOUSEWHEEL:
+        return pygame.event.Event(event_type, x=x, y=y)
+    return pygame.event.Event(event_type)
+
+
+class InputRecorder:
+    """Writes the inputs of every active frame"""
+
+    def __init__(self, path, seed, settings):
+        self.file = open(path, "wb")
+        blob = json.dumps(settings).encode()
+        self.file.write(HEADER.pack(MAGIC, VERSION, seed, len(blob)))
+        self.file.write(blob)
+
+    def write_frame(self, steps, events, mouse_pos, input_lead):
+        records = [r for r in map(encode_event, events) if r is not None]
+        self.file.write(FRAME.pack(steps, len(records), *mouse_pos, round(input_lead * LEAD_UNITS)))
+        self.file.write(b"".join(records))
+
+    def close(self):
+        self.file.close()
+
+
+class InputPlayer:
+    """Reads recorded frames back one at a time"""
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        magic, version, self.seed, size = HEADER.unpack(self.file.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            self.file.close()
+            raise ValueError(f"{path} is not a version {VERSION} input recording")
+        self.settings = json.loads(self.file.read(size))
+
+    def next_frame(self):
+        """(steps, events, mouse_pos, input_lead) for the next frame, or None at the end"""
+        record = self.file.read(FRAME.size)
+        if len(record) < FRAME.size:
+            return None
+        steps, count, mouse_x, mouse_y, lead = FRAME.unpack(record)
+        data = self.file.read(EVENT.size * count)
+        if len(data) < EVENT.size * count:
+            # Torn final frame
+            return None
+        events = [decode_event(data[i:i + EVENT.size]) for i in range(0, len(data), EVENT.size)]
+        return steps, events, (mouse_x, mouse_y), lead / LEAD_UNITS
+
+    def close(self):
+        self.file.close()
@@ -0,0 +1,126 @@
+"""Pluggable CPU goalkeeper models.
+
+A keeper model picks the CPU's dive for each player kick and is shown the
+kick afterwards. FlatKeeper is the original behaviour: read the shot with
+the difficulty's accuracy, otherwise dive to a random wrong side.
+AdaptiveKeeper reads the shot just as often, but when it misreads it
+falls back on what it has learned about the player instead of guessing.
+
+AdaptiveKeeper keeps the last HISTORY kicks in a ring buffer with running
+counts of
+  - each direction,
+  - each direction after the previous one (first-order Markov), and
+  - each direction per power band,
+adding the new kick and subtracting the evicted one, so learning and
+predicting are O(1) per kick with fixed memory.
+"""
+from collections import deque
+
+HISTORY = 20          # kicks remembered
+POWER_BANDS = 3       # soft / medium / hard strikes
+MIN_HISTORY = 3       # kicks seen before predictions are trusted
+CONFIDENCE = 0.45     # predicted probability needed to dive on a prediction
+
+
+class FlatKeeper:
+    """Dives the right way with a fixed probability, else to a random wrong side"""
+
+    def __init__(self, directions):
+        self.directions = list(directions)
+
+    def reset(self):
+        pass
+
+    def dive(self, shot, power, accuracy, rng):
+        if rng.random() < accuracy:
+            return shot
+        return self.fallback(shot, power, rng)
+
+    def fallback(self, shot, power, rng):
+        """Where the keeper goes when it misreads the shot"""
+        return rng.choice([d for d in self.directions if d != shot])
+
+    def read_chance(self, power, accuracy):
+        """Chance the next dive goes where the player shoots"""
+        return accuracy
+
+    def observe(self, shot, power):
+        """Called with every player kick once it has been taken"""
+        pass
+
+
+class AdaptiveKeeper(FlatKeeper):
+    """Learns the player's direction habits: overall, after each direction, and per power band"""
+
+    def __init__(self, directions, history=HISTORY):
+        super().__init__(directions)
+        self.index = {d: i for i, d in enumerate(self.directions)}
+        self.history = history
+        self.reset()
+
+    def reset(self):
+        n = len(self.directions)
+        self.kicks = deque()                                  # (previous, direction, band) per kick
+        self.counts = [0] * n                                 # direction
+        self.after = [[0] * n for _ in range(n)]              # previous direction → direction
+        self.by_band = [[0] * n for _ in range(POWER_BANDS)]  # power band → direction
+        self.previous = None
+
+    def band(self, power):
+        return min(int(power * POWER_BANDS), POWER_BANDS - 1)
+
+    def observe(self, shot, power):
+        kick = (self.previous, self.index[shot], self.band(power))
+        self.kicks.append(kick)
+        self.count(kick, 1)
+        if len(self.kicks) > self.history:
+            self.count(self.kicks.popleft(), -1)
+        self.previous = kick[1]
+
+    def count(self, kick, delta):
+        previous, direction, band = kick
+        self.counts[direction] += delta
+        if previous is not None:
+            self.after[previous][direction] += delta
+        self.by_band[band][direction] += delta
+
+    def predict(self, power):
+        """Probability of each direction for the next kick (Laplace-smoothed blend of the three models)"""
+        n = len(self.directions)
+        models = [self.counts, self.by_band[self.band(power)]]
+        if self.previous is not None:
+            models.append(self.after[self.previous])
+        blend = [0.0] * n
+        for model in models:
+            total = sum(model) + n
+            for i in range(n):
+                blend[i] += (model[i] + 1) / total
+        return [p / len(models) for p in blend]
+
+    def prediction(self, power):
+        """(direction index, probability) the keeper would fall back on, or None"""
+        if len(self.kicks) < MIN_HISTORY:
+            return None
+        probabilities = self.predict(power)
+        best = max(range(len(probabilities)), key=probabilities.__getitem__)
+        return (best, probabilities[best]) if probabilities[best] >= CONFIDENCE else None
+
+    def read_chance(self, power, accuracy):
+        # A misread still ends up right when the player shoots where the model predicts
+        prediction = self.prediction(power)
+        if prediction is None:
+            return accuracy
+        return accuracy + (1 - accuracy) * prediction[1]
+
+    def fallback(self, shot, power, rng):
+        prediction = self.prediction(power)
+        if prediction is not None:
+            # A predictable player: go where they usually shoot
+            return self.directions[prediction[0]]
+        return super().fallback(shot, power, rng)
+
+
+KEEPER_AIS = {
+    "flat": FlatKeeper,
+    "adaptive": AdaptiveKeeper,
+}
@@ -0,0 +1,119 @@
+"""Widget geometry of every screen.
+
+A screen's layout depends only on the window size, so build_layout
+computes every button rect once and get_layout caches the result per
+resolution. The draw_* methods and the click hit registries read the same
+Widget objects, so nothing recomputes button positions per frame and
+drawing and hit-testing always agree.
+"""
+import pygame
+
+DIFFICULTIES = ["easy", "normal", "hard"]
+DIRECTIONS = ["left", "center", "right"]
+TOGGLES = [
+    ("Show Power Meter", "show_power_meter"),
+    ("Show Instructions", "show_instructions"),
+    ("Dirty-Rect Rendering", "dirty_rect_rendering"),
+]
+
+
+class Widget:
+    """One rectangle on a screen and its caption"""
+    __slots__ = ("rect", "label")
+
+    def __init__(self, rect, label=""):
+        self.rect = rect
+        self.label = label
+
+
+class ScreenLayout:
+    """Named widgets of one screen, in the order they are drawn"""
+    __slots__ = ("widgets",)
+
+    def __init__(self):
+        self.widgets = {}
+
+    def add(self, name, x, y, width, height, label=""):
+        widget = self.widgets[name] = Widget(pygame.Rect(x, y, width, height), label)
+        return widget
+
+    def __getitem__(self, name):
+        return self.widgets[name]
+
+
+class Layout:
+    """Every screen's widgets for one window size"""
+    __slots__ = ("size", "menu", "choose_side", "playing", "paused", "game_over", "stats", "settings")
+
+    def __init__(self, size):
+        self.size = size
+        self.menu = ScreenLayout()
+        self.choose_side = ScreenLayout()
+        self.playing = ScreenLayout()
+        self.paused = ScreenLayout()
+        self.game_over = ScreenLayout()
+        self.stats = ScreenLayout()
+        self.settings = ScreenLayout()
+
+
+def build_layout(width, height):
+    """Compute the widgets of every screen for a width x height window"""
+    layout = Layout((width, height))
+    center_x = width // 2
+
+    # Main menu: a centered row of difficulty buttons over three stacked menu buttons
+    screen = layout.menu
+    diff_start_x = center_x - (120 * 3 + 30 * 2) // 2
+    for i, difficulty in enumerate(DIFFICULTIES):
+        screen.add(difficulty, diff_start_x + i * 150, 250, 120, 50, difficulty.title())
+    screen.add("continue", center_x - 100, 400, 200, 60, "Continue")
+    screen.add("stats", center_x - 100, 480, 200, 60, "Statistics")
+    screen.add("settings", center_x - 100, 560, 200, 60, "Settings")
+
+    # Side selection: two side buttons and the start button below them
+    screen = layout.choose_side
+    screen.add("player", center_x - 175, 300, 150, 70, "Player")
+    screen.add("computer", center_x + 25, 300, 150, 70, "Computer")
+    screen.add("start", center_x - 100, 420, 200, 60, "Start Game")
+
+    # Game screen: shot/save direction buttons and the hamburger pause button
+    screen = layout.playing
+    for i, direction in enumerate(DIRECTIONS):
+        screen.add(direction, 300 + i * 150, 600, 120, 60, direction.title())
+    screen.add("pause", width - 50, 10, 40, 30)
+
+    # Pause menu, centered on the screen
+    screen = layout.paused
+    screen.add("resume", center_x - 75, height // 2 - 20, 150, 40, "Resume")
+    screen.add("quit", center_x - 75, height // 2 + 40, 150, 40, "Quit")
+
+    screen = layout.game_over
+    screen.add("play_again", center_x - 100, 450, 200, 60, "Play Again")
+    screen.add("menu", center_x - 100, 530, 200, 60, "Main Menu")
+
+    # Stats screen: history paging either side of the list, back button at the bottom
+    screen = layout.stats
+    screen.add("newer", center_x - 300, 500, 110, 40, "Newer")
+    screen.add("older", center_x + 190, 500, 110, 40, "Older")
+    screen.add("back", center_x - 100, 650, 200, 60, "Back to Menu")
+
+    # Settings: default difficulty row, volume slider track, one toggle per row, back button
+    screen = layout.settings
+    for i, difficulty in enumerate(DIFFICULTIES):
+        screen.add(difficulty, center_x - 170 + i * 120, 180, 100, 40, difficulty.title())
+    screen.add("volume", 200, 300, 400, 20)
+    for i, (text, setting_key) in enumerate(TOGGLES):
+        screen.add(setting_key, center_x + 50, 345 + i * 40, 60, 30, text)
+    screen.add("back", 300, 500, 200, 60, "Back to Menu")
+    return layout
+
+
+layouts = {}  # (width, height) → Layout
+
+
+def get_layout(width, height):
+    """The layout for a width x height window, built on first use"""
+    layout = layouts.get((width, height))
+    if layout is None:
+        layout = layouts[(width, height)] = build_layout(width, height)
+    return layout
@@ -0,0 +1,102 @@
+"""Process-pool shootout simulation with deterministic seeding.
+
+Matches are split into fixed-size chunks and every chunk gets its own
+random.Random stream derived from (seed, chunk index), so the merged
+results are identical whatever the number of workers. Workers run the
+headless ShootoutEngine and only send back aggregate counters.
+
+    python parallel_simulation.py --matches 10000000 --workers 64
+"""
+import argparse
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from shootout_engine import ShootoutEngine, DIFFICULTY_SETTINGS, PLAYER, CPU
+
+CHUNK_SIZE = 20000
+
+
+def empty_totals():
+    """Aggregate counters for a batch of matches"""
+    return {"matches": 0, "wins": 0, "losses": 0, "unfinished": 0,
+            "sudden_death": 0, "kicks": 0, "kick_histogram": Counter()}
+
+
+def merge_totals(totals, part):
+    """Add the counters of `part` into `totals`"""
+    for key in ("matches", "wins", "losses", "unfinished", "sudden_death", "kicks"):
+        totals[key] += part[key]
+    totals["kick_histogram"].update(part["kick_histogram"])
+    return totals
+
+
+def chunk_rng(seed, chunk_index):
+    """RNG stream for one chunk; depends only on the seed and the chunk's position"""
+    return random.Random(f"{seed}:{chunk_index}")
+
+
+def run_chunk(task):
+    """Simulate one chunk of matches in a worker process"""
+    difficulty, matches, seed, chunk_index = task
+    engine = ShootoutEngine(difficulty, rng=chunk_rng(seed, chunk_index))
+    totals = empty_totals()
+    for _ in range(matches):
+        engine.reset()
+        winner = engine.play_match()
+        kicks = engine.player_kicks + engine.cpu_kicks
+        if not engine.game_over:
+            totals["unfinished"] += 1
+        elif winner == PLAYER:
+            totals["wins"] += 1
+        elif winner == CPU:
+            totals["losses"] += 1
+        totals["sudden_death"] += engine.sudden_death
+        totals["kicks"] += kicks
+        totals["kick_histogram"][kicks] += 1
+    totals["matches"] = matches
+    return totals
+
+
+def simulate_parallel(matches, difficulty="normal", workers=None, seed=0, chunk_size=CHUNK_SIZE):
+    """Simulate `matches` matches across a process pool and return merged totals"""
+    tasks = [(difficulty, min(chunk_size, matches - start), seed, index)
+             for index, start in enumerate(range(0, matches, chunk_size))]
+    totals = empty_totals()
+    if workers == 1:
+        # No pool needed; handy for profiling and for checking reproducibility
+        for task in tasks:
+            merge_totals(totals, run_chunk(task))
+        return totals
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for part in pool.map(run_chunk, tasks):
+            merge_totals(totals, part)
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel penalty shootout simulation")
+    parser.add_argument("--matches", type=int, default=1000000)
+    parser.add_argument("--difficulty", choices=sorted(DIFFICULTY_SETTINGS), default=None,
+                        help="simulate one difficulty (default: all)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    difficulties = [args.difficulty] if args.difficulty else list(DIFFICULTY_SETTINGS)
+    for difficulty in difficulties:
+        start = time.perf_counter()
+        totals = simulate_parallel(args.matches, difficulty, args.workers, args.seed, args.chunk_size)
+        elapsed = time.perf_counter() - start
+        n = totals["matches"]
+        print(f"{difficulty.title()}: win {totals['wins']/n*100:.2f}% | loss {totals['losses']/n*100:.2f}% | "
+              f"sudden death {totals['sudden_death']/n*100:.2f}% | mean kicks {totals['kicks']/n:.3f} "
+              f"({n/elapsed:,.0f} matches/s on {args.workers} workers)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,41 @@
 import pygame
+import argparse
 import random
-import math
 import sys
 import os
+import time
 import json
+import hashlib
+from collections import OrderedDict
+from functools import partial
 from datetime import datetime
 
+from stats_store import StatsStore, SqliteStatsStore, StatsRepository
+from settings_store import SettingsWriter
+from replay import ReplayWriter, ReplayReader, Kick, replay_filename
+from input_log import InputRecorder, InputPlayer, LEAD_UNITS
+from frame_timing import FrameProfiler
+from hit_test import HitRegistry
+from layout import get_layout, DIFFICULTIES, TOGGLES
+from trajectory import TrajectoryTable
+from shootout_engine import ShootoutEngine, DIFFICULTY_SETTINGS, SHOT_DIRECTIONS, PLAYER, CPU
+
 # Initialize Pygame
 pygame.init()
 
 # Constants
 SCREEN_WIDTH = 1024
 SCREEN_HEIGHT = 768
-FPS = 60
+FPS = 60  # default render cap
+SIM_STEP = 1.0 / 60  # fixed simulation step (seconds); all game timing counts these
+MAX_FRAME_TIME = 0.25  # clamp long frames so the simulation never spirals
+BALL_SIZE = 30
+BALL_START = (512, 650)  # penalty spot
+CACHE_DIR = ".cache"
+HISTORY_PAGE_SIZE = 5  # rows in the stats screen match history
+IDLE_TIMEOUT_MS = 500  # longest sleep on a static screen before re-checking
+REPLAY_DIR = "replays"  # one binary replay file per match
+PERF_OVERLAY_REFRESH = 30  # frames between updates of the frame timing overlay text
 
 # Colors
 WHITE = (255, 255, 255)
@@ -34,40 +57,100 @@ GAME_OVER = "game_over"
 STATS = "stats"
 SETTINGS = "settings"
 
+class TextCache:
+    """Bounded LRU cache of rendered text surfaces"""
+    
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def render(self, font, text, color, antialias=True):
+        """Return the surface for (font, text, color, antialias), rendering it on a miss"""
+        key = (font, text, tuple(color), antialias)
+        surf = self.surfaces.get(key)
+        if surf is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surf
+        
+        self.misses += 1
+        surf = font.render(text, antialias, color)
+        self.surfaces[key] = surf
+        if len(self.surfaces) > self.max_size:
+            # Evict the least recently used entry
+            self.surfaces.popitem(last=False)
+        return surf
+    
+    def clear(self):
+        """Drop every cached surface and reset the counters"""
+        self.surfaces.clear()
+        self.hits = 0
+        self.misses = 0
+
+def engine_attr(name):
+    """Expose a ShootoutEngine field as a read/write attribute of the front end"""
+    return property(lambda self: getattr(self.engine, name),
+                    lambda self, value: setattr(self.engine, name, value))
+
 class PenaltyShootout:
-    def __init__(self):
+    # Match state lives in the headless engine; these keep the drawing code unchanged
+    user_score = engine_attr("user_score")
+    computer_score = engine_attr("computer_score")
+    player_kicks = engine_attr("player_kicks")
+    cpu_kicks = engine_attr("cpu_kicks")
+    max_kicks = engine_attr("max_kicks")
+    sudden_death = engine_attr("sudden_death")
+    player_results = engine_attr("player_results")
+    cpu_results = engine_attr("cpu_results")
+    
+    def __init__(self, seed=None, record_inputs=None, replay_inputs=None, frame_timing_export=None):
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("Penalty Shootout")
         self.clock = pygame.time.Clock()
         self.font = pygame.font.Font(None, 36)
         self.large_font = pygame.font.Font(None, 48)
         self.small_font = pygame.font.Font(None, 24)
+        self.tiny_font = pygame.font.Font(None, 20)
+        self.text_cache = TextCache()
         
         # Load settings and stats first
         self.settings_file = "game_settings.json"
-        self.stats_file = "game_stats.json"
+        self.stats_file = "game_stats.jsonl"
         self.settings = self.load_settings()
+        # Saves are debounced and written off the main loop
+        self.settings_writer = SettingsWriter(self.settings_file)
+        
+        # Input replays run with the settings and seed they were recorded with
+        self.input_player = InputPlayer(replay_inputs) if replay_inputs else None
+        if self.input_player is not None:
+            self.settings.update(self.input_player.settings)
+            seed = self.input_player.seed
+        
+        # Session RNG: every match seed, and through it every kick seed, is drawn from it
+        if seed is None:
+            seed = self.settings.get("rng_seed")
+        if seed is None:
+            seed = random.getrandbits(63)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.match_seed = 0
+        self.match_rng = random.Random(0)
+        self.input_recorder = InputRecorder(record_inputs, seed, self.settings) if record_inputs else None
+        self.mouse_pos = (0, 0)  # sampled once per frame (or read from the input replay)
         self.stats = self.load_stats()
         
         # Game state
         self.state = MENU
         self.difficulty = self.settings.get("default_difficulty", "normal")
-        self.user_score = 0
-        self.computer_score = 0
+        self.engine = ShootoutEngine(self.difficulty, max_kicks=5)  # initial best-of-five
         self.win_score = 5
         self.current_phase = "player_shoot"  # player_shoot, cpu_shoot
         self.user_is_player = True  # True = user is player, False = user is computer
         self.next_phase = None  # Track next phase after animation
         
-        # Shootout-specific state
-        self.player_kicks = 0      # how many kicks the player has taken
-        self.cpu_kicks = 0         # how many kicks the CPU has taken
-        self.max_kicks = 5         # initial best-of-five
-        self.sudden_death = False  # flag for sudden-death mode
-        
-        # per-kick results: True=goal, False=miss
-        self.player_results = []
-        self.cpu_results = []
+        # Shootout-specific state (scores, kicks, results) is held by self.engine
         self.last_kick_result = None  # Store the result of the last kick
         
         # Animation variables
@@ -75,7 +158,7 @@ class PenaltyShootout:
         self.save_alpha = 0  # For fade-in animations
         
         # Ball and animation state
-        self.ball_pos = [512, 650]
+        self.ball_pos = list(BALL_START)
         self.ball_target = [512, 300]
         self.ball_moving = False
         self.animation_timer = 0
@@ -89,6 +172,10 @@ class PenaltyShootout:
         self.aim_duration = 1.0      # time (sec) to fill from 0→1
         self.fill_level = 0.0        # normalized [0.0, 1.0]
         self.selected_power = 0.0    # locked-in power for this shot
+        self.aim_lead = 0.0          # input lead when aiming started (see locked_power)
+        self.input_lead = 0.0        # real time this frame's input is ahead of the simulation
+        self.input_time = None       # perf_counter when this frame's input was read
+        self.lock_time = None        # input time of a power lock not yet on screen
         self.aim_direction = None    # remember L/C/R for shot target
         
         # Goal dimensions
@@ -98,7 +185,7 @@ class PenaltyShootout:
         self.goal_bottom = 350
         
         # Shot directions
-        self.shot_directions = ["left", "center", "right"]
+        self.shot_directions = SHOT_DIRECTIONS
         self.user_shot = None
         self.computer_shot = None
         self.computer_guess_direction = None
@@ -107,73 +194,61 @@ class PenaltyShootout:
         self.cpu_keeper_guess = None      # when you shoot, CPU "dives"
         
         # Difficulty settings
-        self.difficulty_settings = {
-            "easy": {
-                # CPU almost never saves your shots (10% chance to save)
-                "cpu_guess_accuracy": 0.10,
-                # You almost always save CPU shots (90% dive correctly)
-                "player_guess_accuracy": 0.90,
-            },
-            "normal": {
-                # 40% chance CPU guesses your shot
-                "cpu_guess_accuracy": 0.40,
-                # 40% chance you guess CPU shot
-                "player_guess_accuracy": 0.40,
-            },
-            "hard": {
-                # 60% chance CPU guesses your shot
-                "cpu_guess_accuracy": 0.60,
-                # 60% chance you guess CPU shot
-                "player_guess_accuracy": 0.60,
-            }
-        }
+        self.difficulty_settings = DIFFICULTY_SETTINGS
         
-        # Button rectangles
-        self.buttons = {
-            "left": pygame.Rect(300, 600, 120, 60),
-            "center": pygame.Rect(450, 600, 120, 60),
-            "right": pygame.Rect(600, 600, 120, 60),
-            "easy": pygame.Rect(300, 400, 120, 60),
-            "normal": pygame.Rect(450, 400, 120, 60),
-            "hard": pygame.Rect(600, 400, 120, 60),
-            "player": pygame.Rect(300, 500, 150, 70),
-            "computer": pygame.Rect(550, 500, 150, 70)
-        }
+        # Widget geometry of every screen, computed once for this window size
+        self.layout = get_layout(*self.screen.get_size())
+        
+        # Shot/save direction buttons and the pause (hamburger) button in the top-right
+        self.buttons = {direction: self.layout.playing[direction].rect for direction in SHOT_DIRECTIONS}
+        self.pause_btn = self.layout.playing["pause"].rect
+        
+        # Stats screen history browser: the cached visible page
+        self.history_offset = 0      # games skipped from the newest
+        self.history_page = []
+        self.history_page_key = None
+        
+        # Click targets of every screen, built from the same widgets the draw_* methods use
+        self.build_hit_targets()
+        self.build_event_handlers()
+        
+        # Replays: the file being recorded, and the kicks being played back
+        self.replay_writer = None
+        self.replay_reader = None
+        self.replay_kicks = None
+        self.replay_kick = None   # recorded kick currently in flight
+        self.replaying = False
+        self.kick_seed = 0        # engine RNG seed of the current kick
         
-        # Pause button (hamburger) in top-right
-        self.pause_btn = pygame.Rect(SCREEN_WIDTH - 50, 10, 40, 30)
+        # Static background layer for the game screen (built lazily in get_background)
+        self.background = None
+        self.background_key = None
         
-        # Pause-menu buttons (initialized but hidden until paused)
-        self.resume_btn = pygame.Rect(SCREEN_WIDTH//2 - 75, SCREEN_HEIGHT//2 - 20, 150, 40)
-        self.quit_btn = pygame.Rect(SCREEN_WIDTH//2 - 75, SCREEN_HEIGHT//2 + 40, 150, 40)
+        # Dirty-rect rendering: regions drawn this frame and the previous one
+        self.dirty_rects = []
+        self.prev_dirty_rects = []
+        self.last_drawn_state = None
         
-        # Load soccer ball sprite from PNG
+        # Idle-frame skipping counters (see run)
+        self.active_frames = 0
+        self.idle_frames = 0
+        
+        # Cached win-probability HUD value (see get_win_probability)
+        self.win_probability = 0.0
+        self.win_probability_key = None
+        
+        # Ball flight paths, built once per (target, quantized power)
+        self.trajectories = TrajectoryTable()
+        
+        # Fixed-step simulation: real time of the last frame and not-yet-simulated time
+        self.frame_time = SIM_STEP
+        self.sim_accumulator = 0.0
+        
+        # Load soccer ball sprite from PNG (processed once, then cached on disk)
         self.assets_dir = "assets"
+        self.cache_dir = CACHE_DIR
         try:
-            # Load the raw sprite
-            raw_ball = pygame.image.load(os.path.join(self.assets_dir, 'ball.png')).convert_alpha()
-            
-            # Create a surface with transparency
-            ball_surface = pygame.Surface(raw_ball.get_size(), pygame.SRCALPHA)
-            
-            # Get the pixel array to process the image
-            pixel_array = pygame.PixelArray(raw_ball)
-            
-            # Create a mask to remove white background
-            # Convert white pixels to transparent
-            for x in range(raw_ball.get_width()):
-                for y in range(raw_ball.get_height()):
-                    pixel_color = raw_ball.get_at((x, y))
-                    # Check if pixel is close to white (background)
-                    if pixel_color[0] > 240 and pixel_color[1] > 240 and pixel_color[2] > 240:
-                        # Make white pixels transparent
-                        ball_surface.set_at((x, y), (0, 0, 0, 0))
-                    else:
-                        # Keep non-white pixels as they are
-                        ball_surface.set_at((x, y), pixel_color)
-            
-            # Scale to a smaller size (30x30 pixels)
-            self.ball_img = pygame.transform.smoothscale(ball_surface, (30, 30))
+            self.ball_img = self.load_ball_sprite(os.path.join(self.assets_dir, 'ball.png'))
             
             # No glow effect - just the ball image
             self.ball_glow = None
@@ -184,8 +259,8 @@ class PenaltyShootout:
             print("Creating programmatic soccer ball as fallback")
             
             # Create a simple soccer ball programmatically as fallback
-            self.ball_img = pygame.Surface((30, 30), pygame.SRCALPHA)
-            center = (15, 15)
+            self.ball_img = pygame.Surface((BALL_SIZE, BALL_SIZE), pygame.SRCALPHA)
+            center = (BALL_SIZE // 2, BALL_SIZE // 2)
             radius = 13
             
             # Main ball circle (white)
@@ -209,36 +284,92 @@ class PenaltyShootout:
             
             # No glow effect - just the ball image
             self.ball_glow = None
+        
+        # Frame timing: every loop stage and draw_* method is timed (F3 overlay, F4 export)
+        self.profiler = FrameProfiler()
+        self.profiler.instrument(self, ["handle_events", "update_game", "present"]
+                                 + [name for name in dir(self) if name.startswith("draw_")])
+        self.frame_timing_export = frame_timing_export
+        self.perf_lines = []
+        self.perf_panel = None
+    
+    def load_ball_sprite(self, path):
+        """Load the ball sprite, using the processed on-disk cache when possible"""
+        with open(path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:16]
+        cache_path = os.path.join(self.cache_dir, f"ball_{digest}_{BALL_SIZE}.png")
+        
+        # Fast path: sprite was already processed on a previous launch
+        if os.path.exists(cache_path):
+            try:
+                return pygame.image.load(cache_path).convert_alpha()
+            except pygame.error:
+                pass  # corrupt cache entry, rebuild it below
+        
+        raw_ball = pygame.image.load(path).convert_alpha()
+        
+        # Mask of near-white background pixels (every channel > 240) in one bulk pass
+        white_mask = pygame.mask.from_threshold(raw_ball, (248, 248, 248, 255), (8, 8, 8, 255))
+        white_mask.invert()
+        
+        # Copy the ball pixels through the mask, everything else becomes transparent
+        ball_surface = white_mask.to_surface(setsurface=raw_ball, unsetcolor=(0, 0, 0, 0))
+        
+        # Scale to a smaller size (30x30 pixels)
+        ball_img = pygame.transform.smoothscale(ball_surface.convert_alpha(), (BALL_SIZE, BALL_SIZE))
+        
+        # Persist the processed sprite; a failed write only costs the next launch
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            pygame.image.save(ball_img, cache_path)
+        except (OSError, pygame.error) as e:
+            print(f"Warning: Could not cache ball sprite: {e}")
+        
+        return ball_img
+    
+    def render_text(self, font, text, antialias, color):
+        """Render text through the shared text cache (same signature as font.render)"""
+        return self.text_cache.render(font, text, color, antialias)
+    
+    def mark_dirty(self, rect):
+        """Record a screen region changed this frame (used by dirty-rect rendering)"""
+        self.dirty_rects.append(rect)
+        return rect
+    
+    def blit(self, surface, dest):
+        """Blit onto the screen and record the touched region as dirty"""
+        return self.mark_dirty(self.screen.blit(surface, dest))
     
     def draw_button(self, rect, text, base_color, hover_color):
         """Draw a modern rounded button with hover effects"""
-        mouse_over = rect.collidepoint(pygame.mouse.get_pos())
+        mouse_over = rect.collidepoint(self.mouse_pos)
         color = hover_color if mouse_over else base_color
         # draw rounded rect
-        pygame.draw.rect(self.screen, color, rect, border_radius=12)
+        self.mark_dirty(pygame.draw.rect(self.screen, color, rect, border_radius=12))
         # border
-        pygame.draw.rect(self.screen, BLACK, rect, 2, border_radius=12)
+        self.mark_dirty(pygame.draw.rect(self.screen, BLACK, rect, 2, border_radius=12))
         # text
-        lbl = self.font.render(text, True, WHITE)
-        self.screen.blit(lbl, lbl.get_rect(center=rect.center))
+        lbl = self.render_text(self.font, text, True, WHITE)
+        self.blit(lbl, lbl.get_rect(center=rect.center))
     
     def draw_text(self, text, font, x, y, fg=WHITE):
         """Draw text with drop shadow"""
         # shadow
-        shadow = font.render(text, True, (0,0,0,150))
-        self.screen.blit(shadow, shadow.get_rect(center=(x+2,y+2)))
+        shadow = self.render_text(font, text, True, (0,0,0,150))
+        self.blit(shadow, shadow.get_rect(center=(x+2,y+2)))
         # actual
-        fg_surf = font.render(text, True, fg)
-        self.screen.blit(fg_surf, fg_surf.get_rect(center=(x,y)))
+        fg_surf = self.render_text(font, text, True, fg)
+        self.blit(fg_surf, fg_surf.get_rect(center=(x,y)))
     
-    def draw_hamburger(self):
+    def draw_hamburger(self, surface=None):
         """Draw hamburger menu icon"""
+        surface = surface or self.screen
         x, y, w, h = self.pause_btn
         bar_h = 4
         spacing = 6
         color = WHITE
         for i in range(3):
-            pygame.draw.rect(self.screen, color,
+            pygame.draw.rect(surface, color,
                              (x, y + i*(bar_h + spacing), w, bar_h), border_radius=2)
     
     def draw_power_meter(self):
@@ -254,7 +385,7 @@ class PenaltyShootout:
         
         # Draw background track (dark, semi-transparent)
         background_rect = pygame.Rect(meter_x, meter_y - meter_height, meter_width, meter_height)
-        pygame.draw.rect(self.screen, DARK_GRAY, background_rect, border_radius=5)
+        self.mark_dirty(pygame.draw.rect(self.screen, DARK_GRAY, background_rect, border_radius=5))
         
         # Calculate fill height
         fill_height = int(meter_height * self.fill_level)
@@ -271,47 +402,62 @@ class PenaltyShootout:
         if fill_height > 0:
             fill_rect = pygame.Rect(meter_x + 2, meter_y - fill_height, 
                                    meter_width - 4, fill_height)
-            pygame.draw.rect(self.screen, color, fill_rect, border_radius=5)
+            self.mark_dirty(pygame.draw.rect(self.screen, color, fill_rect, border_radius=5))
         
         # Draw marker arrow next to current fill level
         marker_y = meter_y - fill_height
-        pygame.draw.polygon(self.screen, WHITE, [
+        self.mark_dirty(pygame.draw.polygon(self.screen, WHITE, [
             (meter_x + meter_width + 5, marker_y),
             (meter_x + meter_width + 15, marker_y - 5),
             (meter_x + meter_width + 15, marker_y + 5)
-        ])
+        ]))
         
         # Draw power percentage
-        power_text = self.small_font.render(f"{int(self.fill_level * 100)}%", True, WHITE)
+        power_text = self.render_text(self.small_font, f"{int(self.fill_level * 100)}%", True, WHITE)
         power_rect = power_text.get_rect(center=(meter_x + meter_width//2, meter_y + 20))
-        self.screen.blit(power_text, power_rect)
+        self.blit(power_text, power_rect)
         
         # Draw instructions
-        instruction_text = self.small_font.render("Click to lock power", True, WHITE)
+        instruction_text = self.render_text(self.small_font, "Click to lock power", True, WHITE)
         instruction_rect = instruction_text.get_rect(center=(meter_x + meter_width//2, meter_y + 40))
-        self.screen.blit(instruction_text, instruction_rect)
+        self.blit(instruction_text, instruction_rect)
     
-    def draw_goal(self):
+    def draw_goal(self, surface=None):
         """Draw the goal frame"""
-        pygame.draw.rect(self.screen, WHITE, (self.goal_left, self.goal_top, 
+        surface = surface or self.screen
+        pygame.draw.rect(surface, WHITE, (self.goal_left, self.goal_top, 
                                               self.goal_right - self.goal_left, 
                                               self.goal_bottom - self.goal_top), 3)
         
         # Draw goal posts
-        pygame.draw.line(self.screen, WHITE, (self.goal_left, self.goal_top), 
+        pygame.draw.line(surface, WHITE, (self.goal_left, self.goal_top), 
                         (self.goal_left, self.goal_bottom), 5)
-        pygame.draw.line(self.screen, WHITE, (self.goal_right, self.goal_top), 
+        pygame.draw.line(surface, WHITE, (self.goal_right, self.goal_top), 
                         (self.goal_right, self.goal_bottom), 5)
-        pygame.draw.line(self.screen, WHITE, (self.goal_left, self.goal_top), 
+        pygame.draw.line(surface, WHITE, (self.goal_left, self.goal_top), 
                         (self.goal_right, self.goal_top), 5)
     
+    def get_background(self):
+        """Return the pre-rendered static game background, rebuilding it if stale"""
+        key = (self.goal_left, self.goal_right, self.goal_top, self.goal_bottom,
+               self.screen.get_size())
+        if self.background is None or self.background_key != key:
+            self.background = pygame.Surface(self.screen.get_size()).convert()
+            
+            # Field, goal frame and hamburger icon never change during a match
+            self.background.fill((0, 100, 0))
+            self.draw_goal(self.background)
+            self.draw_hamburger(self.background)
+            self.background_key = key
+        return self.background
+    
     def draw_ball(self):
         """Draw the ball at its current position"""
         x, y = int(self.ball_pos[0]), int(self.ball_pos[1])
         
         # Draw ball sprite only (no glow)
         ball_rect = self.ball_img.get_rect(center=(x, y))
-        self.screen.blit(self.ball_img, ball_rect)
+        self.blit(self.ball_img, ball_rect)
     
     def draw_goalkeeper(self, direction):
         """Draw the goalkeeper"""
@@ -319,17 +465,17 @@ class PenaltyShootout:
         gk_y = 275
         
         # Draw goalkeeper body
-        pygame.draw.circle(self.screen, BLUE, (gk_x, gk_y), 15)
+        self.mark_dirty(pygame.draw.circle(self.screen, BLUE, (gk_x, gk_y), 15))
         
         # Draw goalkeeper arms based on direction
         if direction == "left":
-            pygame.draw.line(self.screen, BLUE, (gk_x, gk_y), (gk_x - 25, gk_y - 10), 5)
-            pygame.draw.line(self.screen, BLUE, (gk_x, gk_y), (gk_x - 25, gk_y + 10), 5)
+            self.mark_dirty(pygame.draw.line(self.screen, BLUE, (gk_x, gk_y), (gk_x - 25, gk_y - 10), 5))
+            self.mark_dirty(pygame.draw.line(self.screen, BLUE, (gk_x, gk_y), (gk_x - 25, gk_y + 10), 5))
         elif direction == "right":
-            pygame.draw.line(self.screen, BLUE, (gk_x, gk_y), (gk_x + 25, gk_y - 10), 5)
-            pygame.draw.line(self.screen, BLUE, (gk_x, gk_y), (gk_x + 25, gk_y + 10), 5)
+            self.mark_dirty(pygame.draw.line(self.screen, BLUE, (gk_x, gk_y), (gk_x + 25, gk_y - 10), 5))
+            self.mark_dirty(pygame.draw.line(self.screen, BLUE, (gk_x, gk_y), (gk_x + 25, gk_y + 10), 5))
         else:  # center
-            pygame.draw.line(self.screen, BLUE, (gk_x, gk_y), (gk_x, gk_y - 25), 5)
+            self.mark_dirty(pygame.draw.line(self.screen, BLUE, (gk_x, gk_y), (gk_x, gk_y - 25), 5))
     
     def draw_scoreboard(self):
         """Draw TV-style shootout tracker"""
@@ -345,7 +491,7 @@ class PenaltyShootout:
                 color = YELLOW if self.player_results[i] else GRAY
             else:
                 color = WHITE
-            pygame.draw.circle(self.screen, color, (x0+i*spacing, y_player), radius)
+            self.mark_dirty(pygame.draw.circle(self.screen, color, (x0+i*spacing, y_player), radius))
 
         # cpu row
         for i in range(self.max_kicks):
@@ -353,7 +499,7 @@ class PenaltyShootout:
                 color = YELLOW if self.cpu_results[i] else GRAY
             else:
                 color = WHITE
-            pygame.draw.circle(self.screen, color, (x0+i*spacing, y_cpu), radius)
+            self.mark_dirty(pygame.draw.circle(self.screen, color, (x0+i*spacing, y_cpu), radius))
     
     def draw_turn_indicator(self):
         """Draw whose turn it is"""
@@ -366,44 +512,32 @@ class PenaltyShootout:
         else:
             text = "CPU SHOT"
             color = RED
-        lbl = self.large_font.render(text, True, color)
+        lbl = self.render_text(self.large_font, text, True, color)
         rect = lbl.get_rect(center=(SCREEN_WIDTH//2, 120))
         # draw a subtle background box
-        pygame.draw.rect(self.screen, BLACK, rect.inflate(20,10))
-        self.screen.blit(lbl, rect)
+        self.mark_dirty(pygame.draw.rect(self.screen, BLACK, rect.inflate(20,10)))
+        self.blit(lbl, rect)
     
     def draw_sudden_death_banner(self):
         """Draw sudden death banner"""
         if self.sudden_death:
-            banner = self.large_font.render("⚽ SUDDEN DEATH ⚽", True, RED)
+            banner = self.render_text(self.large_font, "⚽ SUDDEN DEATH ⚽", True, RED)
             br = banner.get_rect(center=(SCREEN_WIDTH//2, 30))
-            pygame.draw.rect(self.screen, BLACK, br.inflate(30,15))
-            self.screen.blit(banner, br)
+            self.mark_dirty(pygame.draw.rect(self.screen, BLACK, br.inflate(30,15)))
+            self.blit(banner, br)
     
     def animate_ball(self):
         """Animate the ball movement"""
         if self.ball_moving:
-            self.animation_timer += 1
+            self.animation_timer += 1  # counted in simulation steps
             
-            # Calculate ball position based on time with power meter
-            # 1. Mapping fill level → shot duration
-            base_time = 60  # 1 second animation at power=0.5
-            speed_factor = 0.5 + self.selected_power  # ranges 0.5 (weak) → 1.5 (strong)
-            ball_duration = base_time / speed_factor
-            progress = self.animation_timer / ball_duration
+            # Precomputed path from the spot to the target for this power:
+            # stronger shots fly faster (60 steps at power 0.5) with a flatter arc
+            path = self.trajectories.get(BALL_START, self.ball_target, self.selected_power)
             
-            if progress <= 1:
-                # 2. Mapping fill level → arc height
-                x = self.ball_pos[0] + (self.ball_target[0] - self.ball_pos[0]) * progress
-                # max_arc = 150, arc_height = max_arc * (1.0 - p)
-                arc_height = 150 * (1 - self.selected_power)  # more arc at low power
-                y = self.ball_pos[1] - arc_height * math.sin(progress * math.pi) + (self.ball_target[1] - self.ball_pos[1]) * progress
-                
-                self.ball_pos = [x, y]
-                
-                # Draw ball during animation (no glow)
-                ball_rect = self.ball_img.get_rect(center=(int(x), int(y)))
-                self.screen.blit(self.ball_img, ball_rect)
+            if self.animation_timer * 2 <= len(path):
+                i = (self.animation_timer - 1) * 2
+                self.ball_pos = [path[i], path[i + 1]]
             else:
                 self.ball_moving = False
                 self.animation_timer = 0
@@ -412,45 +546,26 @@ class PenaltyShootout:
                 in_net = (self.goal_left < self.ball_pos[0] < self.goal_right and 
                           self.goal_top < self.ball_pos[1] < self.goal_bottom)
                 
-                # Determine if it was a goal
-                was_goal = False
-                if in_net:
-                    if self.current_phase == "player_shoot":
-                        # 3. Mapping fill level → keeper's save chance
-                        settings = self.difficulty_settings[self.difficulty]
-                        base_save = settings["cpu_guess_accuracy"]
-                        
-                        # reduce save chance by up to 50% at full power
-                        modifier = 1.0 - (self.selected_power * 0.5)    
-                        # → at p=0   → modifier=1.0  (no change)
-                        # → at p=1.0 → modifier=0.5  (halved save chance)
-                        final_save_chance = base_save * modifier
-                        
-                        # When the ball crosses the line you then roll:
-                        if random.random() < final_save_chance and self.user_shot == self.cpu_keeper_guess:
-                            # CPU "dives" correctly → save
-                            self.save_animation = True
-                            was_goal = False  # saved
-                        else:
-                            # goal
-                            self.user_score += 1
-                            self.goal_animation = True
-                            was_goal = True   # goal
-
-                    elif self.current_phase == "cpu_shoot":
-                        # compare CPU shot vs your dive
-                        if self.computer_shot == self.player_keeper_guess:
-                            self.save_animation = True
-                            was_goal = False  # saved
-                        else:
-                            self.computer_score += 1
-                            self.goal_animation = True
-                            was_goal = True   # goal
-
+                # Determine if it was a goal (the engine updates the score)
+                if self.current_phase == "player_shoot":
+                    was_goal = self.engine.resolve_player_shot(
+                        self.user_shot, self.cpu_keeper_guess, self.selected_power, in_net)
+                    self.record_kick(Kick(PLAYER, self.user_shot, self.cpu_keeper_guess,
+                                          self.selected_power, self.kick_seed, in_net, was_goal))
+                elif self.current_phase == "cpu_shoot":
+                    # compare CPU shot vs your dive
+                    was_goal = self.engine.resolve_cpu_shot(
+                        self.computer_shot, self.player_keeper_guess, in_net)
+                    self.record_kick(Kick(CPU, self.computer_shot, self.player_keeper_guess,
+                                          0.0, self.kick_seed, in_net, was_goal))
+                else:
+                    was_goal = False
+                
+                if was_goal:
+                    self.goal_animation = True
                 else:
-                    # shot went wide
+                    # saved or shot went wide
                     self.save_animation = True
-                    was_goal = False  # missed
                 
                 # Store the result for end_of_kick
                 self.last_kick_result = was_goal
@@ -470,17 +585,8 @@ class PenaltyShootout:
             return [self.goal_right - 50, self.goal_top + 75]
     
     def computer_guess(self):
-        """Computer makes a guess based on difficulty"""
-        settings = self.difficulty_settings[self.difficulty]
-        
-        # Base accuracy on difficulty
-        if random.random() < settings["guess_accuracy"]:
-            # Computer guesses correctly
-            return self.user_shot
-        else:
-            # Computer guesses wrong
-            wrong_directions = [d for d in self.shot_directions if d != self.user_shot]
-            return random.choice(wrong_directions)
+        """CPU keeper's dive for the locked shot (difficulty accuracy + keeper model)"""
+        return self.engine.cpu_keeper_dive(self.user_shot, self.selected_power)
     
     def draw_menu(self):
         """Draw the main menu"""
@@ -488,108 +594,73 @@ class PenaltyShootout:
         
         # Show forfeit message if applicable
         if hasattr(self, "forfeit_message"):
-            msg = self.small_font.render(self.forfeit_message, True, RED)
+            msg = self.render_text(self.small_font, self.forfeit_message, True, RED)
             rect = msg.get_rect(center=(SCREEN_WIDTH//2, 150))
-            self.screen.blit(msg, rect)
+            self.blit(msg, rect)
         
         # Title
-        title = self.large_font.render("Penalty Shootout", True, WHITE)
+        title = self.render_text(self.large_font, "Penalty Shootout", True, WHITE)
         title_rect = title.get_rect(center=(SCREEN_WIDTH//2, 100))
-        self.screen.blit(title, title_rect)
+        self.blit(title, title_rect)
         
         # Difficulty selection
-        subtitle = self.font.render("Select Difficulty:", True, WHITE)
+        subtitle = self.render_text(self.font, "Select Difficulty:", True, WHITE)
         subtitle_rect = subtitle.get_rect(center=(SCREEN_WIDTH//2, 200))
-        self.screen.blit(subtitle, subtitle_rect)
+        self.blit(subtitle, subtitle_rect)
         
         # Difficulty buttons (centered)
-        diff_button_width = 120
-        diff_button_height = 50
-        diff_button_spacing = 30
-        total_diff_width = diff_button_width * 3 + diff_button_spacing * 2
-        diff_start_x = (SCREEN_WIDTH - total_diff_width) // 2
-        diff_y = 250
-        
-        for i, difficulty in enumerate(["easy", "normal", "hard"]):
-            diff_rect = pygame.Rect(diff_start_x + i * (diff_button_width + diff_button_spacing), diff_y, diff_button_width, diff_button_height)
+        widgets = self.layout.menu
+        for difficulty in DIFFICULTIES:
+            widget = widgets[difficulty]
             base_color = YELLOW if difficulty == self.difficulty else GRAY
             hover_color = LIGHT_GRAY
-            self.draw_button(diff_rect, difficulty.title(), base_color, hover_color)
+            self.draw_button(widget.rect, widget.label, base_color, hover_color)
         
         # Show difficulty settings between difficulty buttons and continue button
         settings = self.difficulty_settings[self.difficulty]
-        settings_text = self.small_font.render(f"CPU: {settings['cpu_guess_accuracy']*100:.0f}% | You: {settings['player_guess_accuracy']*100:.0f}%", True, WHITE)
+        settings_text = self.render_text(self.small_font, f"CPU: {settings['cpu_guess_accuracy']*100:.0f}% | You: {settings['player_guess_accuracy']*100:.0f}%", True, WHITE)
         settings_rect = settings_text.get_rect(center=(SCREEN_WIDTH//2, 350))
-        self.screen.blit(settings_text, settings_rect)
+        self.blit(settings_text, settings_rect)
         
         # Menu buttons (centered and evenly spaced)
-        button_width = 200
-        button_height = 60
-        button_spacing = 20
-        total_height = button_height * 3 + button_spacing * 2
-        start_y = 400  # Moved up to make room for percentage text
-        center_x = SCREEN_WIDTH // 2 - button_width // 2
-        
-        # Continue button
-        continue_rect = pygame.Rect(center_x, start_y, button_width, button_height)
-        self.draw_button(continue_rect, "Continue", RED, (200, 0, 0))
-        
-        # Stats button
-        stats_rect = pygame.Rect(center_x, start_y + button_height + button_spacing, button_width, button_height)
-        self.draw_button(stats_rect, "Statistics", BLUE, (0, 0, 200))
-        
-        # Settings button
-        settings_rect = pygame.Rect(center_x, start_y + (button_height + button_spacing) * 2, button_width, button_height)
-        self.draw_button(settings_rect, "Settings", GRAY, LIGHT_GRAY)
+        for name, base_color, hover_color in [("continue", RED, (200, 0, 0)), ("stats", BLUE, (0, 0, 200)),
+                                              ("settings", GRAY, LIGHT_GRAY)]:
+            self.draw_button(widgets[name].rect, widgets[name].label, base_color, hover_color)
     
     def draw_choose_side(self):
         """Draw the side selection screen"""
         self.screen.fill(GREEN)
         
         # Title
-        title = self.large_font.render("Choose Your Side", True, WHITE)
+        title = self.render_text(self.large_font, "Choose Your Side", True, WHITE)
         title_rect = title.get_rect(center=(SCREEN_WIDTH//2, 150))
-        self.screen.blit(title, title_rect)
+        self.blit(title, title_rect)
         
-        # Center the side selection buttons
-        button_width = 150
-        button_height = 70
-        button_spacing = 50
-        total_width = button_width * 2 + button_spacing
-        start_x = (SCREEN_WIDTH - total_width) // 2
-        y_pos = 300
+        widgets = self.layout.choose_side
         
         # Player button
-        player_rect = pygame.Rect(start_x, y_pos, button_width, button_height)
         base_color = YELLOW if self.user_is_player else GRAY
         hover_color = LIGHT_GRAY
-        self.draw_button(player_rect, "Player", base_color, hover_color)
+        self.draw_button(widgets["player"].rect, "Player", base_color, hover_color)
         
         # Computer button
-        computer_rect = pygame.Rect(start_x + button_width + button_spacing, y_pos, button_width, button_height)
         base_color = YELLOW if not self.user_is_player else GRAY
         hover_color = LIGHT_GRAY
-        self.draw_button(computer_rect, "Computer", base_color, hover_color)
+        self.draw_button(widgets["computer"].rect, "Computer", base_color, hover_color)
         
         # Start button (centered below the side buttons)
-        start_rect = pygame.Rect(SCREEN_WIDTH//2 - 100, y_pos + button_height + 50, 200, 60)
-        self.draw_button(start_rect, "Start Game", RED, (200, 0, 0))
+        self.draw_button(widgets["start"].rect, "Start Game", RED, (200, 0, 0))
     
     def draw_game(self):
         """Draw the game screen"""
-        self.screen.fill(GREEN)
-        
-        # Draw field first
-        pygame.draw.rect(self.screen, (0, 100, 0), (0, 0, SCREEN_WIDTH, SCREEN_HEIGHT))
+        # Draw field, goal and hamburger icon from the cached background layer
+        self.screen.blit(self.get_background(), (0, 0))  # not dirty: static layer
         
         # Draw TV-style scoreboard on top
         self.draw_scoreboard()
         self.draw_turn_indicator()
         self.draw_sudden_death_banner()
         
-        # Draw goal
-        self.draw_goal()
-        
         # Draw ball
         self.draw_ball()
         
@@ -601,101 +672,111 @@ class PenaltyShootout:
         
         # Draw shot direction buttons (only when user is shooting)
         if self.current_phase == "player_shoot" and not self.ball_moving:
-            for direction, rect in [("left", self.buttons["left"]), 
-                                   ("center", self.buttons["center"]), 
-                                   ("right", self.buttons["right"])]:
+            for direction in SHOT_DIRECTIONS:
+                widget = self.layout.playing[direction]
                 base_color = YELLOW if direction == self.user_shot else GRAY
                 hover_color = LIGHT_GRAY
-                self.draw_button(rect, direction.title(), base_color, hover_color)
+                self.draw_button(widget.rect, widget.label, base_color, hover_color)
         
         # Draw power meter instructions when in power-aim phase
         elif self.current_phase == "power_aim":
             # Hide direction buttons during power meter
-            instruction_text = self.large_font.render("Click to lock power!", True, YELLOW)
+            instruction_text = self.render_text(self.large_font, "Click to lock power!", True, YELLOW)
             instruction_rect = instruction_text.get_rect(center=(SCREEN_WIDTH//2, 380))
-            self.screen.blit(instruction_text, instruction_rect)
+            self.blit(instruction_text, instruction_rect)
         
         # Draw save direction buttons (when player is saving)
         elif self.current_phase == "player_save" and not self.ball_moving:
-            for direction, rect in [("left", self.buttons["left"]), 
-                                   ("center", self.buttons["center"]), 
-                                   ("right", self.buttons["right"])]:
+            for direction in SHOT_DIRECTIONS:
+                widget = self.layout.playing[direction]
                 base_color = YELLOW if direction == self.player_keeper_guess else GRAY
                 hover_color = LIGHT_GRAY
-                self.draw_button(rect, direction.title(), base_color, hover_color)
+                self.draw_button(widget.rect, widget.label, base_color, hover_color)
         
         # Draw power meter
         self.draw_power_meter()
         
-        # Draw hamburger icon
-        self.draw_hamburger()
-        
         # If paused: overlay menu
         if self.state == PAUSED:
             # dim the game screen
             overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
             overlay.fill((0,0,0,180))
-            self.screen.blit(overlay, (0,0))
+            self.screen.blit(overlay, (0,0))  # only appears on a state change
 
             # Draw Resume & Quit buttons
-            self.draw_button(self.resume_btn, "Resume", GRAY, LIGHT_GRAY)
-            self.draw_button(self.quit_btn, "Quit", GRAY, LIGHT_GRAY)
+            for widget in self.layout.paused.widgets.values():
+                self.draw_button(widget.rect, widget.label, GRAY, LIGHT_GRAY)
         
         # Draw score
-        score_text = self.font.render(f"You: {self.user_score}  Computer: {self.computer_score}", True, WHITE)
-        self.screen.blit(score_text, (10, 10))
+        score_text = self.render_text(self.font, f"You: {self.user_score}  Computer: {self.computer_score}", True, WHITE)
+        self.blit(score_text, (10, 10))
         
         # Draw turn indicator
         if self.current_phase == "player_shoot":
-            turn_text = self.font.render("Your turn to shoot!", True, WHITE)
+            turn_text = self.render_text(self.font, "Your turn to shoot!", True, WHITE)
         elif self.current_phase == "player_save":
-            turn_text = self.font.render("Save the shot!", True, WHITE)
+            turn_text = self.render_text(self.font, "Save the shot!", True, WHITE)
         elif self.current_phase == "cpu_shoot":
-            turn_text = self.font.render("Computer is shooting...", True, WHITE)
+            turn_text = self.render_text(self.font, "Computer is shooting...", True, WHITE)
         else:
-            turn_text = self.font.render("Waiting...", True, WHITE)
-        self.screen.blit(turn_text, (10, 50))
+            turn_text = self.render_text(self.font, "Waiting...", True, WHITE)
+        self.blit(turn_text, (10, 50))
         
         # Draw difficulty and settings
-        diff_text = self.small_font.render(f"Difficulty: {self.difficulty.title()}", True, WHITE)
-        self.screen.blit(diff_text, (10, 90))
+        diff_text = self.render_text(self.small_font, f"Difficulty: {self.difficulty.title()}", True, WHITE)
+        self.blit(diff_text, (10, 90))
         
         # Show current difficulty settings
         settings = self.difficulty_settings[self.difficulty]
-        cpu_acc_text = self.small_font.render(f"CPU Save: {settings['cpu_guess_accuracy']*100:.0f}%", True, WHITE)
-        player_acc_text = self.small_font.render(f"Your Save: {settings['player_guess_accuracy']*100:.0f}%", True, WHITE)
-        self.screen.blit(cpu_acc_text, (10, 110))
-        self.screen.blit(player_acc_text, (10, 130))
+        # The keeper model's current read (an adaptive keeper's rises as it learns the player)
+        cpu_read = self.engine.keeper_read_chance(self.fill_level if self.aiming else self.selected_power)
+        cpu_acc_text = self.render_text(self.small_font, f"CPU Save: {cpu_read*100:.0f}%", True, WHITE)
+        player_acc_text = self.render_text(self.small_font, f"Your Save: {settings['player_guess_accuracy']*100:.0f}%", True, WHITE)
+        self.blit(cpu_acc_text, (10, 110))
+        self.blit(player_acc_text, (10, 130))
         
         # Show power meter effects when aiming
         if self.aiming:
-            power_effects = self.small_font.render(f"Power: {int(self.fill_level*100)}% → Speed: {1.0/(0.5 + self.fill_level):.1f}s", True, YELLOW)
-            self.screen.blit(power_effects, (10, 150))
+            power_effects = self.render_text(self.small_font, f"Power: {int(self.fill_level*100)}% → Speed: {1.0/(0.5 + self.fill_level):.1f}s", True, YELLOW)
+            self.blit(power_effects, (10, 150))
             
             # Show save chance modifier
             settings = self.difficulty_settings[self.difficulty]
             base_save = settings["cpu_guess_accuracy"]
             modifier = 1.0 - (self.fill_level * 0.5)
             final_save = base_save * modifier
-            save_chance_text = self.small_font.render(f"Save chance: {final_save*100:.0f}% (base: {base_save*100:.0f}%)", True, YELLOW)
-            self.screen.blit(save_chance_text, (10, 170))
+            save_chance_text = self.render_text(self.small_font, f"Save chance: {final_save*100:.0f}% (base: {base_save*100:.0f}%)", True, YELLOW)
+            self.blit(save_chance_text, (10, 170))
+        
+        # Win probability HUD (top right, under the pause button)
+        win_text = self.render_text(self.small_font, f"Win probability: {self.get_win_probability()*100:.0f}%", True, WHITE)
+        self.blit(win_text, win_text.get_rect(topright=(SCREEN_WIDTH - 10, 50)))
         
         # Draw result messages with fade-in animations
         if self.goal_animation:
-            if self.goal_alpha < 255:
-                self.goal_alpha += 5  # fade in speed
-            goal_surf = self.large_font.render("GOAL!", True, YELLOW)
+            # cached surface is shared, so the alpha is set fresh every frame
+            goal_surf = self.render_text(self.large_font, "GOAL!", True, YELLOW)
             goal_surf.set_alpha(self.goal_alpha)
             rect = goal_surf.get_rect(center=(SCREEN_WIDTH//2, 300))
-            self.screen.blit(goal_surf, rect)
+            self.blit(goal_surf, rect)
         
         if self.save_animation:
-            if self.save_alpha < 255:
-                self.save_alpha += 5  # fade in speed
-            save_surf = self.large_font.render("SAVED!", True, RED)
+            # cached surface is shared, so the alpha is set fresh every frame
+            save_surf = self.render_text(self.large_font, "SAVED!", True, RED)
             save_surf.set_alpha(self.save_alpha)
             rect = save_surf.get_rect(center=(SCREEN_WIDTH//2, 300))
-            self.screen.blit(save_surf, rect)
+            self.blit(save_surf, rect)
+    
+    def get_win_probability(self):
+        """Exact chance the user wins from here, recomputed only when the match state changes"""
+        # Odds are for the locked-in power: following the sweeping meter would
+        # re-solve the DP for a new power almost every frame while aiming
+        power = round(self.selected_power, 2)
+        key = (self.difficulty, self.player_kicks, self.cpu_kicks, power)
+        if key != self.win_probability_key:
+            self.win_probability = self.engine.win_probability(power)[0]
+            self.win_probability_key = key
+        return self.win_probability
     
     def draw_game_over(self):
         """Draw the game over screen"""
@@ -703,52 +784,50 @@ class PenaltyShootout:
         
         # Show forfeit message if applicable
         if hasattr(self, "forfeit_message"):
-            forfeit_text = self.large_font.render(self.forfeit_message, True, RED)
+            forfeit_text = self.render_text(self.large_font, self.forfeit_message, True, RED)
             forfeit_rect = forfeit_text.get_rect(center=(SCREEN_WIDTH//2, 150))
-            self.screen.blit(forfeit_text, forfeit_rect)
+            self.blit(forfeit_text, forfeit_rect)
         
         # Final score
-        score_text = self.large_font.render(f"Final Score: You {self.user_score} - Computer {self.computer_score}", True, WHITE)
+        score_text = self.render_text(self.large_font, f"Final Score: You {self.user_score} - Computer {self.computer_score}", True, WHITE)
         score_rect = score_text.get_rect(center=(SCREEN_WIDTH//2, 200))
-        self.screen.blit(score_text, score_rect)
+        self.blit(score_text, score_rect)
         
         # Winner
         if hasattr(self, "forfeit_message"):
-            winner_text = self.large_font.render("Computer Wins!", True, RED)
+            winner_text = self.render_text(self.large_font, "Computer Wins!", True, RED)
         elif self.user_score > self.computer_score:
-            winner_text = self.large_font.render("You Win!", True, YELLOW)
+            winner_text = self.render_text(self.large_font, "You Win!", True, YELLOW)
         elif self.computer_score > self.user_score:
-            winner_text = self.large_font.render("Computer Wins!", True, RED)
+            winner_text = self.render_text(self.large_font, "Computer Wins!", True, RED)
         else:
-            winner_text = self.large_font.render("It's a Tie!", True, WHITE)
+            winner_text = self.render_text(self.large_font, "It's a Tie!", True, WHITE)
         
         winner_rect = winner_text.get_rect(center=(SCREEN_WIDTH//2, 250))
-        self.screen.blit(winner_text, winner_rect)
+        self.blit(winner_text, winner_rect)
         
         # Shootout information
-        kicks_text = self.font.render(f"Kicks taken: You {self.player_kicks} - Computer {self.cpu_kicks}", True, WHITE)
+        kicks_text = self.render_text(self.font, f"Kicks taken: You {self.player_kicks} - Computer {self.cpu_kicks}", True, WHITE)
         kicks_rect = kicks_text.get_rect(center=(SCREEN_WIDTH//2, 300))
-        self.screen.blit(kicks_text, kicks_rect)
+        self.blit(kicks_text, kicks_rect)
         
         if self.sudden_death:
-            sudden_death_text = self.font.render("Sudden Death Mode", True, RED)
+            sudden_death_text = self.render_text(self.font, "Sudden Death Mode", True, RED)
             sudden_death_rect = sudden_death_text.get_rect(center=(SCREEN_WIDTH//2, 330))
-            self.screen.blit(sudden_death_text, sudden_death_rect)
-        
-        # Play again button (centered)
-        play_again_rect = pygame.Rect(SCREEN_WIDTH//2 - 100, 450, 200, 60)
-        self.draw_button(play_again_rect, "Play Again", BLUE, (0, 0, 200))
+            self.blit(sudden_death_text, sudden_death_rect)
         
-        # Menu button (centered)
-        menu_rect = pygame.Rect(SCREEN_WIDTH//2 - 100, 530, 200, 60)
-        self.draw_button(menu_rect, "Main Menu", GRAY, LIGHT_GRAY)
+        # Play again and menu buttons (centered)
+        self.draw_button(self.layout.game_over["play_again"].rect, "Play Again", BLUE, (0, 0, 200))
+        self.draw_button(self.layout.game_over["menu"].rect, "Main Menu", GRAY, LIGHT_GRAY)
     
     def reset_game(self):
         """Reset the game state"""
-        self.user_score = 0
-        self.computer_score = 0
+        self.engine.reset(self.difficulty)
+        self.close_replays()
+        self.match_seed = self.rng.getrandbits(63)
+        self.match_rng = random.Random(self.match_seed)
         self.current_phase = "player_shoot"
-        self.ball_pos = [512, 650]
+        self.ball_pos = list(BALL_START)
         self.ball_moving = False
         self.animation_timer = 0
         self.goal_animation = False
@@ -765,16 +844,8 @@ class PenaltyShootout:
         self.save_alpha = 0
         
         # Reset ball position for sprite
-        self.ball_pos = [512, 650]
-        
-        # NEW: Reset shootout-specific state
-        self.player_kicks = 0
-        self.cpu_kicks = 0
-        self.sudden_death = False
+        self.ball_pos = list(BALL_START)
         
-        # NEW: Clear per-kick results
-        self.player_results = []
-        self.cpu_results = []
         self.last_kick_result = None
         
         # Clear forfeit message when starting new game
@@ -788,10 +859,6 @@ class PenaltyShootout:
         self.selected_power = 0.0
         self.aim_direction = None
         
-        # Load statistics
-        self.stats_file = "game_stats.json"
-        self.stats = self.load_stats()
-        
         # Reset stats recording flag
         if hasattr(self, "stats_recorded"):
             del self.stats_recorded
@@ -799,20 +866,17 @@ class PenaltyShootout:
 
     
     def load_stats(self):
-        """Load statistics from file"""
-        try:
-            with open(self.stats_file, 'r') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            return {"games": [], "total_games": 0, "wins": 0, "losses": 0, "ties": 0}
-    
-    def save_stats(self):
-        """Save statistics to file"""
-        with open(self.stats_file, 'w') as f:
-            json.dump(self.stats, f, indent=2)
+        """Open the statistics repository (files are read lazily, once)"""
+        store = StatsStore(self.stats_file)
+        if self.settings.get("stats_backend") == "sqlite":
+            # First use of the database imports the existing JSON history
+            store = SqliteStatsStore("game_stats.db", migrate_from=store)
+        return StatsRepository(store)
     
     def record_game_stats(self):
         """Record current game statistics"""
+        if self.input_player is not None:
+            return  # a replayed session was recorded when it was played
         game_stats = {
             "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "difficulty": self.difficulty,
@@ -831,106 +895,94 @@ class PenaltyShootout:
         else:
             game_stats["player_accuracy"] = 0.0
         
-        self.stats["games"].append(game_stats)
-        self.stats["total_games"] += 1
-        
-        # Update win/loss/ties
-        if self.user_score > self.computer_score:
-            self.stats["wins"] += 1
-        elif self.computer_score > self.user_score:
-            self.stats["losses"] += 1
-        else:
-            self.stats["ties"] += 1
-        
-        self.save_stats()
+        # Updates win/loss/ties in memory and appends to the log
+        self.stats.record(game_stats)
     
     def load_settings(self):
         """Load settings from file"""
+        settings = {
+            "default_difficulty": "normal",
+            "sound_volume": 0.7,
+            "show_power_meter": True,
+            "show_instructions": True,
+            "ball_speed": 1.0,
+            "dirty_rect_rendering": False,
+            "idle_frame_skipping": True,
+            "max_fps": FPS,  # 0 = uncapped
+            "stats_backend": "jsonl",  # or "sqlite"
+            "record_replays": True,
+            "rng_seed": None,  # fixed session seed for reproducible runs; None = random
+            "show_perf_overlay": False
+        }
         try:
             with open(self.settings_file, 'r') as f:
-                return json.load(f)
+                # Saved values win; defaults fill in keys added since the file was written
+                settings.update(json.load(f))
         except FileNotFoundError:
-            return {
-                "default_difficulty": "normal",
-                "sound_volume": 0.7,
-                "show_power_meter": True,
-                "show_instructions": True,
-                "ball_speed": 1.0
-            }
+            pass
+        return settings
     
     def save_settings(self):
-        """Save settings to file"""
-        with open(self.settings_file, 'w') as f:
-            json.dump(self.settings, f, indent=2)
+        """Queue a settings save (written in the background once clicks settle)"""
+        if self.input_player is not None:
+            return  # replayed sessions never touch the saved settings
+        self.settings_writer.save(self.settings)
     
     def draw_settings_screen(self):
         """Draw the settings screen"""
         self.screen.fill(GREEN)
         
         # Title
-        title = self.large_font.render("Game Settings", True, WHITE)
+        title = self.render_text(self.large_font, "Game Settings", True, WHITE)
         title_rect = title.get_rect(center=(SCREEN_WIDTH//2, 50))
-        self.screen.blit(title, title_rect)
+        self.blit(title, title_rect)
         
-        # Settings options
-        y_pos = 120
-        line_height = 50
+        widgets = self.layout.settings
         
         # Default difficulty
-        diff_text = self.font.render(f"Default Difficulty: {self.settings['default_difficulty'].title()}", True, WHITE)
-        diff_rect = diff_text.get_rect(center=(SCREEN_WIDTH//2, y_pos))
-        self.screen.blit(diff_text, diff_rect)
+        diff_text = self.render_text(self.font, f"Default Difficulty: {self.settings['default_difficulty'].title()}", True, WHITE)
+        diff_rect = diff_text.get_rect(center=(SCREEN_WIDTH//2, 120))
+        self.blit(diff_text, diff_rect)
         
         # Difficulty buttons
-        y_pos += 60
-        for difficulty in ["easy", "normal", "hard"]:
-            btn_rect = pygame.Rect(200 + (difficulty == "easy") * 100, y_pos, 100, 40)
+        for difficulty in DIFFICULTIES:
+            widget = widgets[difficulty]
             color = YELLOW if self.settings["default_difficulty"] == difficulty else GRAY
-            self.draw_button(btn_rect, difficulty.title(), color, LIGHT_GRAY)
+            self.draw_button(widget.rect, widget.label, color, LIGHT_GRAY)
         
         # Sound volume
-        y_pos += 80
-        vol_text = self.font.render(f"Sound Volume: {int(self.settings['sound_volume'] * 100)}%", True, WHITE)
-        vol_rect = vol_text.get_rect(center=(SCREEN_WIDTH//2, y_pos))
-        self.screen.blit(vol_text, vol_rect)
+        vol_text = self.render_text(self.font, f"Sound Volume: {int(self.settings['sound_volume'] * 100)}%", True, WHITE)
+        vol_rect = vol_text.get_rect(center=(SCREEN_WIDTH//2, 260))
+        self.blit(vol_text, vol_rect)
         
         # Volume slider
-        y_pos += 40
-        vol_slider_rect = pygame.Rect(200, y_pos, 400, 20)
-        pygame.draw.rect(self.screen, GRAY, vol_slider_rect)
-        vol_fill_rect = pygame.Rect(200, y_pos, int(400 * self.settings['sound_volume']), 20)
-        pygame.draw.rect(self.screen, BLUE, vol_fill_rect)
-        
-        # Toggle options
-        y_pos += 60
-        toggle_texts = [
-            ("Show Power Meter", "show_power_meter"),
-            ("Show Instructions", "show_instructions")
-        ]
-        
-        for text, setting_key in toggle_texts:
-            toggle_text = self.font.render(text, True, WHITE)
-            toggle_rect = toggle_text.get_rect(center=(SCREEN_WIDTH//2 - 100, y_pos))
-            self.screen.blit(toggle_text, toggle_rect)
+        track = widgets["volume"].rect
+        self.mark_dirty(pygame.draw.rect(self.screen, GRAY, track))
+        fill_width = int(track.width * self.settings['sound_volume'])
+        self.mark_dirty(pygame.draw.rect(self.screen, BLUE, (track.x, track.y, fill_width, track.height)))
+        
+        # Toggle options: label to the left of each toggle button
+        for text, setting_key in TOGGLES:
+            widget = widgets[setting_key]
+            toggle_text = self.render_text(self.font, widget.label, True, WHITE)
+            toggle_rect = toggle_text.get_rect(center=(SCREEN_WIDTH//2 - 100, widget.rect.centery))
+            self.blit(toggle_text, toggle_rect)
             
             # Toggle button
-            toggle_btn_rect = pygame.Rect(SCREEN_WIDTH//2 + 50, y_pos - 15, 60, 30)
             color = GREEN if self.settings[setting_key] else RED
-            self.draw_button(toggle_btn_rect, "ON" if self.settings[setting_key] else "OFF", color, LIGHT_GRAY)
-            y_pos += 40
+            self.draw_button(widget.rect, "ON" if self.settings[setting_key] else "OFF", color, LIGHT_GRAY)
         
         # Back button
-        back_rect = pygame.Rect(300, 500, 200, 60)
-        self.draw_button(back_rect, "Back to Menu", GRAY, LIGHT_GRAY)
+        self.draw_button(widgets["back"].rect, widgets["back"].label, GRAY, LIGHT_GRAY)
     
     def draw_stats_screen(self):
         """Draw the statistics screen"""
         self.screen.fill(GREEN)
         
         # Title
-        title = self.large_font.render("Game Statistics", True, WHITE)
+        title = self.render_text(self.large_font, "Game Statistics", True, WHITE)
         title_rect = title.get_rect(center=(SCREEN_WIDTH//2, 50))
-        self.screen.blit(title, title_rect)
+        self.blit(title, title_rect)
         
         # Overall stats
         total_games = self.stats["total_games"]
@@ -955,288 +1007,268 @@ class PenaltyShootout:
             f"Win Rate: {win_rate:.1f}%"
         ]
         
+        # Rolling aggregates (kept up to date per game, never recomputed here)
+        agg = self.stats.aggregates
+        if agg.total_games > 0:
+            streak = f"{agg.streak_outcome}{agg.streak_length}" if agg.streak_outcome else "-"
+            stats_texts += [
+                " | ".join(f"{d.title()} {agg.win_rate(d)*100:.0f}%" for d in ["easy", "normal", "hard"]
+                           if d in agg.by_difficulty),
+                f"Accuracy: {agg.accuracy_mean*100:.0f}% ± {agg.accuracy_stddev*100:.0f}%",
+                f"Sudden Death: {agg.sudden_death_rate*100:.1f}%",
+                f"Streak: {streak} (best win streak {agg.best_win_streak})",
+                f"Form: last 50 {agg.form(50)*100:.0f}% | last 500 {agg.form(500)*100:.0f}%"
+            ]
+        
         for text in stats_texts:
-            stat_text = self.font.render(text, True, WHITE)
+            stat_text = self.render_text(self.font, text, True, WHITE)
             stat_rect = stat_text.get_rect(center=(SCREEN_WIDTH//2, y_pos))
-            self.screen.blit(stat_text, stat_rect)
+            self.blit(stat_text, stat_rect)
             y_pos += line_height
         
-        # Recent games
+        # Match history (one page, newest first)
         y_pos += 20
-        recent_title = self.font.render("Recent Games:", True, WHITE)
+        recent_title = self.render_text(self.font, "Match History:", True, WHITE)
         recent_rect = recent_title.get_rect(center=(SCREEN_WIDTH//2, y_pos))
-        self.screen.blit(recent_title, recent_rect)
+        self.blit(recent_title, recent_rect)
         y_pos += line_height
         
-        # Show last 5 games
-        recent_games = self.stats["games"][-5:] if self.stats["games"] else []
-        for game in recent_games:
+        # Show the current page of games
+        for game in self.get_history_page():
             result = "W" if game["player_score"] > game["cpu_score"] else "L" if game["player_score"] < game["cpu_score"] else "T"
             game_text = f"{result} {game['player_score']}-{game['cpu_score']} ({game['difficulty']})"
-            game_stat = self.small_font.render(game_text, True, WHITE)
+            game_stat = self.render_text(self.small_font, game_text, True, WHITE)
             game_rect = game_stat.get_rect(center=(SCREEN_WIDTH//2, y_pos))
-            self.screen.blit(game_stat, game_rect)
+            self.blit(game_stat, game_rect)
             y_pos += 25
         
+        # Paging controls and position
+        count = self.stats.game_count
+        if count > 0:
+            first = self.history_offset + 1
+            last = min(self.history_offset + HISTORY_PAGE_SIZE, count)
+            page_text = self.render_text(self.small_font, f"Games {first}-{last} of {count}", True, WHITE)
+            self.blit(page_text, page_text.get_rect(center=(SCREEN_WIDTH//2, y_pos + 10)))
+        if self.history_offset > 0:
+            self.draw_button(self.layout.stats["newer"].rect, "Newer", GRAY, LIGHT_GRAY)
+        if self.history_offset + HISTORY_PAGE_SIZE < count:
+            self.draw_button(self.layout.stats["older"].rect, "Older", GRAY, LIGHT_GRAY)
+        
         # Back button (centered)
-        back_rect = pygame.Rect(SCREEN_WIDTH//2 - 100, 650, 200, 60)
-        self.draw_button(back_rect, "Back to Menu", GRAY, LIGHT_GRAY)
+        self.draw_button(self.layout.stats["back"].rect, "Back to Menu", GRAY, LIGHT_GRAY)
+    
+    def get_history_page(self):
+        """Visible history rows, re-read from disk only when the page or count changes"""
+        key = (self.history_offset, self.stats.game_count)
+        if key != self.history_page_key:
+            self.history_page = self.stats.page(self.history_offset, HISTORY_PAGE_SIZE)
+            self.history_page_key = key
+        return self.history_page
+    
+    def scroll_history(self, rows):
+        """Move the history view by `rows` (positive = older), clamped to the stored games"""
+        last_offset = max(self.stats.game_count - HISTORY_PAGE_SIZE, 0)
+        self.history_offset = min(max(self.history_offset + rows, 0), last_offset)
     
     def end_of_kick(self, was_goal):
         """Handle end-of-kick logic for shootout rules"""
         # was_goal is a boolean you pass in:
         #   True  → shooter scored
         #   False → shooter was saved/missed
+        shooter = PLAYER if self.current_phase == "player_shoot" else CPU
+        if self.engine.end_of_kick(shooter, was_goal):
+            self.state = GAME_OVER
+            return
         
-        # 1) count the kick and record result
-        if self.current_phase == "player_shoot":
-            self.player_kicks += 1
-            self.player_results.append(was_goal)
-        elif self.current_phase == "cpu_shoot":
-            self.cpu_kicks += 1
-            self.cpu_results.append(was_goal)
-
-        # 2) check insurmountable lead
-        lead = self.user_score - self.computer_score
-        if lead > 0:
-            # player leads by `lead`; CPU has (max_kicks - cpu_kicks) kicks left
-            if lead > (self.max_kicks - self.cpu_kicks):
-                self.state = GAME_OVER
-                return
-        elif lead < 0:
-            # CPU leads; player has (max_kicks - player_kicks) kicks left
-            if -lead > (self.max_kicks - self.player_kicks):
-                self.state = GAME_OVER
-                return
-
-        # 3) after five each, if tied → sudden death
-        if self.player_kicks == self.max_kicks and self.cpu_kicks == self.max_kicks:
-            if self.user_score != self.computer_score:
-                self.state = GAME_OVER
-                return
-            self.sudden_death = True
-
-        # 4) pick next phase (always alternate)
+        # pick next phase (always alternate)
         if self.current_phase == "player_shoot":
             self.current_phase = "cpu_shoot"
         else:
             self.current_phase = "player_shoot"
     
-    def handle_events(self):
+    def build_hit_targets(self):
+        """Per-state hit registries over the layout's widget rects, built once"""
+        # Each registry maps the layout's rect objects to what a click on them does
+        self.hit_targets = {state: HitRegistry()
+                            for state in [MENU, CHOOSE_SIDE, PLAYING, PAUSED, GAME_OVER, STATS, SETTINGS]}
+        layout = self.layout
+        
+        hits = self.hit_targets[MENU]
+        for difficulty in DIFFICULTIES:
+            hits.add(layout.menu[difficulty].rect, partial(setattr, self, "difficulty", difficulty))
+        hits.add(layout.menu["continue"].rect, partial(setattr, self, "state", CHOOSE_SIDE))
+        hits.add(layout.menu["stats"].rect, partial(setattr, self, "state", STATS))
+        hits.add(layout.menu["settings"].rect, partial(setattr, self, "state", SETTINGS))
+        
+        hits = self.hit_targets[CHOOSE_SIDE]
+        hits.add(layout.choose_side["player"].rect, partial(setattr, self, "user_is_player", True))
+        hits.add(layout.choose_side["computer"].rect, partial(setattr, self, "user_is_player", False))
+        hits.add(layout.choose_side["start"].rect, self.start_game)
+        
+        hits = self.hit_targets[PLAYING]
+        for direction in SHOT_DIRECTIONS:
+            hits.add(layout.playing[direction].rect, partial(self.choose_direction, direction))
+        hits.add(layout.playing["pause"].rect, partial(setattr, self, "state", PAUSED))
+        
+        hits = self.hit_targets[PAUSED]
+        hits.add(layout.paused["resume"].rect, partial(setattr, self, "state", PLAYING))
+        hits.add(layout.paused["quit"].rect, self.forfeit)
+        
+        hits = self.hit_targets[GAME_OVER]
+        hits.add(layout.game_over["play_again"].rect, self.start_game)
+        hits.add(layout.game_over["menu"].rect, partial(setattr, self, "state", MENU))
+        
+        hits = self.hit_targets[STATS]
+        hits.add(layout.stats["newer"].rect, partial(self.scroll_history, -HISTORY_PAGE_SIZE))
+        hits.add(layout.stats["older"].rect, partial(self.scroll_history, HISTORY_PAGE_SIZE))
+        hits.add(layout.stats["back"].rect, self.close_stats)
+        
+        hits = self.hit_targets[SETTINGS]
+        for difficulty in DIFFICULTIES:
+            hits.add(layout.settings[difficulty].rect, partial(self.set_default_difficulty, difficulty))
+        for text, setting_key in TOGGLES:
+            hits.add(layout.settings[setting_key].rect, partial(self.toggle_setting, setting_key))
+        hits.add(layout.settings["back"].rect, partial(setattr, self, "state", MENU))
+    
+    def build_event_handlers(self):
+        """Event handlers keyed by (state, event type), and key bindings keyed by (state, key)"""
+        self.event_handlers = {}
+        for state in self.hit_targets:
+            self.event_handlers[(state, pygame.MOUSEBUTTONDOWN)] = self.on_click
+            self.event_handlers[(state, pygame.KEYDOWN)] = self.on_key
+        self.event_handlers[(GAME_OVER, pygame.MOUSEBUTTONDOWN)] = self.on_game_over_click
+        # Mouse wheel scrolls the stats screen history one row at a time
+        self.event_handlers[(STATS, pygame.MOUSEWHEEL)] = lambda event: self.scroll_history(-event.y)
+        
+        # A state of None binds the key on every screen
+        self.key_bindings = {
+            (PLAYING, pygame.K_SPACE): self.lock_power,
+            (None, pygame.K_F3): self.toggle_perf_overlay,
+            (None, pygame.K_F4): self.export_recent_frame_timing,
+        }
+    
+    def handle_events(self, events=None):
         """Handle pygame events"""
-        for event in pygame.event.get():
+        if events is None:
+            events = pygame.event.get()
+        for event in events:
             if event.type == pygame.QUIT:
                 return False
+            handler = self.event_handlers.get((self.state, event.type))
+            if handler is not None:
+                handler(event)
+        return True
+    
+    def on_click(self, event):
+        """Run the action of the button under the click, if any"""
+        if event.button != 1:
+            return  # pygame 2 also sends wheel notches as buttons 4/5; MOUSEWHEEL handles those
+        action = self.hit_targets[self.state].hit(event.pos)
+        if action is not None:
+            action()
+    
+    def on_game_over_click(self, event):
+        if event.button != 1:
+            return
+        # Record stats when game ends (replays were recorded the first time round)
+        if not hasattr(self, "stats_recorded") and not self.replaying:
+            self.record_game_stats()
+            self.stats_recorded = True
+        self.on_click(event)
+    
+    def on_key(self, event):
+        action = self.key_bindings.get((self.state, event.key)) or self.key_bindings.get((None, event.key))
+        if action is not None:
+            action()
+    
+    def start_game(self):
+        self.state = PLAYING
+        self.reset_game()
+    
+    def forfeit(self):
+        """Quit from the pause menu: the computer wins"""
+        # Set forfeit message and go to game over state
+        self.forfeit_message = "You forfeited the match!"
+        print("Forfeit message set!")  # Debug output
+        # Set computer as winner and go to game over
+        self.computer_score = 5
+        self.user_score = 0
+        self.state = GAME_OVER
+    
+    def close_stats(self):
+        self.state = MENU
+        self.history_offset = 0
+    
+    def set_default_difficulty(self, difficulty):
+        self.settings["default_difficulty"] = difficulty
+        self.difficulty = difficulty
+        self.save_settings()
+    
+    def toggle_setting(self, setting_key):
+        self.settings[setting_key] = not self.settings[setting_key]
+        self.save_settings()
+    
+    def toggle_perf_overlay(self):
+        # F3 toggles the frame timing overlay
+        self.settings["show_perf_overlay"] = not self.settings.get("show_perf_overlay", False)
+        self.perf_lines = []
+        self.save_settings()
+    
+    def export_recent_frame_timing(self):
+        # F4 exports the recent frames
+        self.export_frame_timing("frame_timing.csv")
+        self.export_frame_timing("frame_timing.json")
+    
+    def choose_direction(self, direction):
+        """Click on a shot or save direction button"""
+        # Kicks come from the file while a replay is playing
+        if self.replaying:
+            return
+        
+        # Handle player shooting (not while the last kick's result is still showing)
+        if (self.current_phase == "player_shoot" and not self.ball_moving
+                and not self.goal_animation and not self.save_animation):
+            if not self.aiming:
+                # First click: enter power-aim phase
+                self.aiming = True
+                self.aim_timer = 0.0
+                self.aim_lead = self.input_lead
+                self.fill_level = 0.0
+                self.aim_direction = direction
+                self.current_phase = "power_aim"
+            else:
+                # Second click: lock power and shoot
+                self.shoot()
+        
+        # Handle player saving
+        elif self.current_phase == "player_save" and not self.ball_moving:
+            self.player_keeper_guess = direction
             
-            if event.type == pygame.KEYDOWN:
-                # Handle spacebar for power meter
-                if event.key == pygame.K_SPACE and self.current_phase == "power_aim":
-                    self.selected_power = self.fill_level
-                    self.aiming = False
-                    self.current_phase = "player_shoot"
-                    self.user_shot = self.aim_direction
-                    
-                    # CPU picks a dive direction based on difficulty
-                    settings = self.difficulty_settings[self.difficulty]
-                    
-                    if random.random() < settings["cpu_guess_accuracy"]:
-                        # CPU dives correctly
-                        self.cpu_keeper_guess = self.user_shot
-                    else:
-                        # CPU dives wrong
-                        wrong = [d for d in self.shot_directions if d != self.user_shot]
-                        self.cpu_keeper_guess = random.choice(wrong)
-                    
-                    # now kick off the animation as before:
-                    self.ball_target = self.get_shot_target(self.user_shot)
-                    self.ball_moving = True
-            
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                mouse_pos = pygame.mouse.get_pos()
-                
-                if self.state == MENU:
-                    # Check difficulty buttons
-                    # Calculate button positions (same as in draw_menu)
-                    button_width = 200
-                    button_height = 60
-                    button_spacing = 20
-                    start_y = 400  # Moved up to match draw_menu
-                    center_x = SCREEN_WIDTH // 2 - button_width // 2
-                    
-                    # Check difficulty buttons (same positions as in draw_menu)
-                    diff_button_width = 120
-                    diff_button_height = 50
-                    diff_button_spacing = 30
-                    total_diff_width = diff_button_width * 3 + diff_button_spacing * 2
-                    diff_start_x = (SCREEN_WIDTH - total_diff_width) // 2
-                    diff_y = 250
-                    
-                    for i, difficulty in enumerate(["easy", "normal", "hard"]):
-                        diff_rect = pygame.Rect(diff_start_x + i * (diff_button_width + diff_button_spacing), diff_y, diff_button_width, diff_button_height)
-                        if diff_rect.collidepoint(mouse_pos):
-                            self.difficulty = difficulty
-                    
-                    # Check continue button
-                    continue_rect = pygame.Rect(center_x, start_y, button_width, button_height)
-                    if continue_rect.collidepoint(mouse_pos):
-                        self.state = CHOOSE_SIDE
-                    
-                    # Check stats button
-                    stats_rect = pygame.Rect(center_x, start_y + button_height + button_spacing, button_width, button_height)
-                    if stats_rect.collidepoint(mouse_pos):
-                        self.state = STATS
-                    
-                    # Check settings button
-                    settings_rect = pygame.Rect(center_x, start_y + (button_height + button_spacing) * 2, button_width, button_height)
-                    if settings_rect.collidepoint(mouse_pos):
-                        self.state = SETTINGS
-                
-                elif self.state == CHOOSE_SIDE:
-                    # Calculate button positions (same as in draw_choose_side)
-                    button_width = 150
-                    button_height = 70
-                    button_spacing = 50
-                    total_width = button_width * 2 + button_spacing
-                    start_x = (SCREEN_WIDTH - total_width) // 2
-                    y_pos = 300
-                    
-                    # Check player button
-                    player_rect = pygame.Rect(start_x, y_pos, button_width, button_height)
-                    if player_rect.collidepoint(mouse_pos):
-                        self.user_is_player = True
-                    
-                    # Check computer button
-                    computer_rect = pygame.Rect(start_x + button_width + button_spacing, y_pos, button_width, button_height)
-                    if computer_rect.collidepoint(mouse_pos):
-                        self.user_is_player = False
-                    
-                    # Check start button
-                    start_rect = pygame.Rect(SCREEN_WIDTH//2 - 100, y_pos + button_height + 50, 200, 60)
-                    if start_rect.collidepoint(mouse_pos):
-                        self.state = PLAYING
-                        self.reset_game()
-                
-                elif self.state == PLAYING:
-                    # Check pause button first
-                    if self.pause_btn.collidepoint(mouse_pos):
-                        # go into PAUSED state
-                        self.state = PAUSED
-                        return True
-                    
-                    # Handle player shooting
-                    if self.current_phase == "player_shoot" and not self.ball_moving:
-                        # Check shot direction buttons
-                        for direction, rect in [("left", self.buttons["left"]), 
-                                               ("center", self.buttons["center"]), 
-                                               ("right", self.buttons["right"])]:
-                            if rect.collidepoint(mouse_pos):
-                                if not self.aiming:
-                                    # First click: enter power-aim phase
-                                    self.aiming = True
-                                    self.aim_timer = 0.0
-                                    self.fill_level = 0.0
-                                    self.aim_direction = direction
-                                    self.current_phase = "power_aim"
-                                else:
-                                    # Second click: lock power and shoot
-                                    self.selected_power = self.fill_level
-                                    self.aiming = False
-                                    self.current_phase = "player_shoot"
-                                    self.user_shot = self.aim_direction
-                                    
-                                    # CPU picks a dive direction based on difficulty
-                                    settings = self.difficulty_settings[self.difficulty]
-                                    
-                                    if random.random() < settings["cpu_guess_accuracy"]:
-                                        # CPU dives correctly
-                                        self.cpu_keeper_guess = self.user_shot
-                                    else:
-                                        # CPU dives wrong
-                                        wrong = [d for d in self.shot_directions if d != self.user_shot]
-                                        self.cpu_keeper_guess = random.choice(wrong)
-                                    
-                                    # now kick off the animation as before:
-                                    self.ball_target = self.get_shot_target(self.user_shot)
-                                    self.ball_moving = True
-                    
-                    # Handle player saving
-                    elif self.current_phase == "player_save" and not self.ball_moving:
-                        # Check save direction buttons
-                        for direction, rect in [("left", self.buttons["left"]), 
-                                               ("center", self.buttons["center"]), 
-                                               ("right", self.buttons["right"])]:
-                            if rect.collidepoint(mouse_pos):
-                                self.player_keeper_guess = direction
-                                
-                                # CPU has already decided where to shoot (in update_game)
-                                # Just start the animation with the pre-determined shot
-                                self.ball_target = self.get_shot_target(self.computer_shot)
-                                self.ball_moving = True
-                                self.current_phase = "cpu_shoot"
-                
-                elif self.state == PAUSED:
-                    # Resume?
-                    if self.resume_btn.collidepoint(mouse_pos):
-                        self.state = PLAYING
-                    # Quit (forfeit)
-                    elif self.quit_btn.collidepoint(mouse_pos):
-                        # Set forfeit message and go to game over state
-                        self.forfeit_message = "You forfeited the match!"
-                        print("Forfeit message set!")  # Debug output
-                        # Set computer as winner and go to game over
-                        self.computer_score = 5
-                        self.user_score = 0
-                        self.state = GAME_OVER
-                    return True  # swallow other clicks while paused
-                
-                elif self.state == GAME_OVER:
-                    # Record stats when game ends
-                    if not hasattr(self, "stats_recorded"):
-                        self.record_game_stats()
-                        self.stats_recorded = True
-                    
-                    # Check play again button
-                    play_again_rect = pygame.Rect(SCREEN_WIDTH//2 - 100, 450, 200, 60)
-                    if play_again_rect.collidepoint(mouse_pos):
-                        self.state = PLAYING
-                        self.reset_game()
-                    
-                    # Check menu button
-                    menu_rect = pygame.Rect(SCREEN_WIDTH//2 - 100, 530, 200, 60)
-                    if menu_rect.collidepoint(mouse_pos):
-                        self.state = MENU
-                
-                elif self.state == STATS:
-                    # Check back button
-                    back_rect = pygame.Rect(SCREEN_WIDTH//2 - 100, 650, 200, 60)
-                    if back_rect.collidepoint(mouse_pos):
-                        self.state = MENU
-                
-                elif self.state == SETTINGS:
-                    # Check difficulty buttons
-                    y_pos = 180
-                    for difficulty in ["easy", "normal", "hard"]:
-                        btn_rect = pygame.Rect(200 + (difficulty == "easy") * 100, y_pos, 100, 40)
-                        if btn_rect.collidepoint(mouse_pos):
-                            self.settings["default_difficulty"] = difficulty
-                            self.difficulty = difficulty
-                            self.save_settings()
-                    
-                    # Check toggle buttons
-                    y_pos = 320
-                    for setting_key in ["show_power_meter", "show_instructions"]:
-                        toggle_btn_rect = pygame.Rect(SCREEN_WIDTH//2 + 50, y_pos - 15, 60, 30)
-                        if toggle_btn_rect.collidepoint(mouse_pos):
-                            self.settings[setting_key] = not self.settings[setting_key]
-                            self.save_settings()
-                        y_pos += 40
-                    
-                    # Check back button
-                    back_rect = pygame.Rect(300, 500, 200, 60)
-                    if back_rect.collidepoint(mouse_pos):
-                        self.state = MENU
+            # CPU has already decided where to shoot (in update_game)
+            # Just start the animation with the pre-determined shot
+            self.ball_target = self.get_shot_target(self.computer_shot)
+            self.ball_moving = True
+            self.current_phase = "cpu_shoot"
+    
+    def lock_power(self):
+        # Spacebar locks the power meter
+        if self.current_phase == "power_aim" and not self.replaying:
+            self.shoot()
+    
+    def shoot(self):
+        """Take the aimed shot with the locked-in power"""
+        self.selected_power = self.locked_power()
+        self.aiming = False
+        self.current_phase = "player_shoot"
+        self.user_shot = self.aim_direction
         
-        return True
+        # CPU picks a dive direction based on difficulty
+        self.begin_kick()
+        self.cpu_keeper_guess = self.computer_guess()
+        
+        # now kick off the animation as before:
+        self.ball_target = self.get_shot_target(self.user_shot)
+        self.ball_moving = True
     
     def update_game(self):
         """Update game logic"""
@@ -1245,10 +1277,8 @@ class PenaltyShootout:
         
         # Update power meter fill animation
         if self.aiming:
-            dt = 1.0 / FPS  # delta time
-            self.aim_timer += dt
-            # loop every aim_duration
-            self.fill_level = (self.aim_timer % self.aim_duration) / self.aim_duration
+            self.aim_timer += SIM_STEP
+            self.fill_level = self.meter_level(self.aim_timer)
         
         # Animate ball
         self.animate_ball()
@@ -1258,23 +1288,39 @@ class PenaltyShootout:
             # Switch to player save phase so player can choose dive
             self.current_phase = "player_save"
         
+        # Replay: take the next recorded player kick once the last kick has finished
+        if (self.replaying and self.current_phase == "player_shoot" and self.user_shot is None
+                and not self.ball_moving and not self.goal_animation and not self.save_animation):
+            self.play_replay_kick()
+        
         # Handle CPU shot decision when entering player_save phase
-        if self.current_phase == "player_save" and self.computer_shot is None:
+        if self.current_phase == "player_save" and self.computer_shot is None and self.begin_kick():
             # CPU decides where to shoot BEFORE player chooses dive direction
-            settings = self.difficulty_settings[self.difficulty]
-            
-            # CPU randomly picks a direction (not influenced by player's choice)
-            self.computer_shot = random.choice(self.shot_directions)
+            self.computer_shot = self.engine.cpu_pick_shot()
+            if self.replaying:
+                # Dive where the user dived and shoot straight away
+                self.player_keeper_guess = self.replay_kick.keeper_guess
+                self.ball_target = self.get_shot_target(self.computer_shot)
+                self.ball_moving = True
+                self.current_phase = "cpu_shoot"
+        
+        # Fade in result messages
+        if self.goal_animation and self.goal_alpha < 255:
+            self.goal_alpha += 5  # fade in speed (per step)
+        if self.save_animation and self.save_alpha < 255:
+            self.save_alpha += 5  # fade in speed (per step)
         
         # Handle round completion
         if self.goal_animation or self.save_animation:
             self.animation_delay += 1
-            if self.animation_delay > 120:  # Wait 2 seconds (60 FPS * 2)
+            if self.animation_delay > 120:  # Wait 2 seconds (120 steps)
                 # Clear animations & reset ball
                 self.goal_animation = False
                 self.save_animation = False
+                self.goal_alpha = 0
+                self.save_alpha = 0
                 self.animation_delay = 0
-                self.ball_pos = [512, 650]  # Reset to original position
+                self.ball_pos = list(BALL_START)  # Reset to original position
                 self.user_shot = None
                 self.computer_shot = None
                 self.computer_guess_direction = None
@@ -1284,13 +1330,200 @@ class PenaltyShootout:
                     self.end_of_kick(self.last_kick_result)
                     self.last_kick_result = None
     
+    def meter_level(self, aim_time):
+        """Power meter level `aim_time` seconds of simulation after aiming started"""
+        # Aiming started when its click was read, input_lead ahead of the simulation
+        elapsed = max(0.0, aim_time - self.aim_lead)
+        # loop every aim_duration
+        return (elapsed % self.aim_duration) / self.aim_duration
+    
+    def locked_power(self):
+        """Meter level at the moment the lock was read, not at the last simulation step"""
+        # fill_level is up to a frame behind: the time since the last step has not been
+        # simulated yet. Measured on the simulation clock, so replays and frame rates agree.
+        self.lock_time = self.input_time
+        return self.meter_level(self.aim_timer + self.input_lead)
+    
+    def draw_perf_overlay(self):
+        """Frame timing overlay: frame-time percentiles and the costliest sections"""
+        if not self.settings.get("show_perf_overlay", False):
+            return
+        # Re-rendering changing numbers every frame would skew what we measure
+        if not self.perf_lines or self.active_frames % PERF_OVERLAY_REFRESH == 0:
+            self.perf_lines = self.profiler.overlay_lines()
+        
+        height = len(self.perf_lines) * 18 + 10
+        if self.perf_panel is None or self.perf_panel.get_height() != height:
+            self.perf_panel = pygame.Surface((290, height), pygame.SRCALPHA)
+            self.perf_panel.fill((0, 0, 0, 170))
+        top = SCREEN_HEIGHT - height - 10
+        self.blit(self.perf_panel, (10, top))
+        for i, (label, value) in enumerate(self.perf_lines):
+            color = YELLOW if i < 2 else WHITE
+            self.blit(self.render_text(self.tiny_font, label, True, color), (18, top + 6 + i * 18))
+            if value:
+                text = self.render_text(self.tiny_font, value, True, color)
+                self.blit(text, text.get_rect(topright=(292, top + 6 + i * 18)))
+    
+    def export_frame_timing(self, path):
+        """Write the recent frame timings to a .csv (per frame) or .json (summary) file"""
+        try:
+            self.profiler.export(path)
+            print(f"Frame timings written to {path}")
+        except OSError as e:
+            print(f"Warning: Could not write frame timings: {e}")
+    
+    def begin_kick(self):
+        """Seed the engine for the kick about to be taken; False if a replay has run out"""
+        if self.replaying:
+            # Play back the next recorded kick with the seed it was taken with
+            self.replay_kick = next(self.replay_kicks, None) if self.replay_kicks is not None else None
+            if self.replay_kick is None:
+                self.replay_kicks = None  # run out: nothing more will happen on its own
+                return False
+            self.kick_seed = self.replay_kick.seed
+        else:
+            self.kick_seed = self.match_rng.getrandbits(32)
+        self.engine.seed_kick(self.kick_seed)
+        return True
+    
+    def record_kick(self, kick):
+        """Append a resolved kick to this match's replay file"""
+        if self.replaying or self.input_player is not None or not self.settings.get("record_replays", True):
+            return
+        if self.replay_writer is None:
+            # Opened on the first kick so abandoned menus leave no empty files
+            path = os.path.join(REPLAY_DIR, replay_filename(datetime.now()))
+            self.replay_writer = ReplayWriter(path, self.difficulty, self.max_kicks, self.match_seed)
+        self.replay_writer.write_kick(kick)
+    
+    def start_replay(self, path):
+        """Play a recorded match back through the normal animations"""
+        reader = ReplayReader(path)
+        self.difficulty = reader.difficulty
+        self.state = PLAYING
+        self.reset_game()
+        self.replay_reader = reader
+        self.replay_kicks = iter(reader)
+        self.replaying = True
+    
+    def play_replay_kick(self):
+        """Shoot the next recorded player kick"""
+        if not self.begin_kick():
+            return
+        self.user_shot = self.replay_kick.shot
+        self.selected_power = self.replay_kick.power
+        # Same RNG call as a live kick, so the dive and save roll come out the same
+        self.cpu_keeper_guess = self.computer_guess()
+        self.ball_target = self.get_shot_target(self.user_shot)
+        self.ball_moving = True
+    
+    def close_replays(self):
+        """Finish the replay being recorded and stop any playback"""
+        if self.replay_writer is not None:
+            self.replay_writer.close()
+            self.replay_writer = None
+        if self.replay_reader is not None:
+            self.replay_reader.close()
+            self.replay_reader = None
+        self.replay_kicks = None
+        self.replay_kick = None
+        self.replaying = False
+    
+    def present(self):
+        """Push the frame to the display, updating only dirty regions when enabled"""
+        state_changed = self.state != self.last_drawn_state
+        if self.settings.get("dirty_rect_rendering", False) and not state_changed:
+            # Regions drawn last frame are included so vanished elements get erased
+            pygame.display.update(self.dirty_rects + self.prev_dirty_rects)
+        else:
+            # Full flip on state transitions (and when dirty-rect mode is off)
+            pygame.display.flip()
+        
+        self.prev_dirty_rects = self.dirty_rects
+        self.dirty_rects = []
+        self.last_drawn_state = self.state
+    
+    def is_animating(self):
+        """Whether something on screen changes without user input"""
+        if self.state != PLAYING:
+            return False
+        return (self.ball_moving or self.goal_animation or self.save_animation or self.aiming
+                or self.transition_pending())
+    
+    def transition_pending(self):
+        """Whether update_game will move the game on by itself with nothing animating"""
+        if self.ball_moving or self.goal_animation or self.save_animation:
+            return False
+        if self.current_phase == "cpu_shoot":
+            return True  # switches to player_save
+        if self.current_phase == "player_save" and self.computer_shot is None:
+            return self.replay_kicks is not None or not self.replaying  # CPU picks its shot
+        # Replay: the next recorded player kick is taken
+        return (self.replaying and self.replay_kicks is not None
+                and self.current_phase == "player_shoot" and self.user_shot is None)
+    
+    def wait_for_events(self):
+        """Block until an event arrives (or IDLE_TIMEOUT_MS passes) and return the queued events"""
+        event = pygame.event.wait(IDLE_TIMEOUT_MS)
+        if event.type == pygame.NOEVENT:
+            return []
+        return [event] + pygame.event.get()
+    
     def run(self):
         """Main game loop"""
         running = True
+        last_frame = None
+        steps = 0
+        
+        started = time.perf_counter()
         
         while running:
-            running = self.handle_events()
-            self.update_game()
+            recorded = None
+            frame = (self.state, self.current_phase)
+            if self.input_player is not None:
+                # Replay: inputs, mouse position and step count all come from the recording
+                recorded = self.input_player.next_frame()
+                if recorded is None or pygame.event.get(pygame.QUIT):
+                    break
+                steps, events, self.mouse_pos, self.input_lead = recorded
+                pygame.event.pump()
+            elif (self.settings.get("idle_frame_skipping", True) and frame == last_frame
+                    and steps > 0 and not self.is_animating()):
+                # Idle mode: nothing animating and nothing changed last frame → sleep until input
+                # (a frame that ran no simulation steps may have left an update_game
+                # transition undone, so only a frame that stepped can start idling)
+                events = self.wait_for_events()
+                if not events:
+                    self.idle_frames += 1
+                    continue
+                # Time spent asleep is not simulation time
+                self.clock.tick()
+                self.frame_time = SIM_STEP
+            else:
+                events = pygame.event.get()
+            self.input_time = time.perf_counter()
+            if recorded is None:
+                self.mouse_pos = pygame.mouse.get_pos()
+                # Real time not yet simulated: leftover plus the frame about to be simulated
+                # (rounded to the resolution the input recording stores)
+                self.input_lead = round((self.sim_accumulator + self.frame_time) * LEAD_UNITS) / LEAD_UNITS
+            self.profiler.begin_frame()
+            running = self.handle_events(events)
+            last_frame = frame
+            self.active_frames += 1
+            
+            # Advance the simulation in fixed steps covering the real frame time
+            if recorded is None:
+                steps = 0
+                self.sim_accumulator += self.frame_time
+                while self.sim_accumulator >= SIM_STEP:
+                    steps += 1
+                    self.sim_accumulator -= SIM_STEP
+            for _ in range(steps):
+                self.update_game()
+            if self.input_recorder is not None:
+                self.input_recorder.write_frame(steps, events, self.mouse_pos, self.input_lead)
             
             # Draw based on state
             if self.state == MENU:
@@ -1307,13 +1540,45 @@ class PenaltyShootout:
                 self.draw_stats_screen()
             elif self.state == SETTINGS:
                 self.draw_settings_screen()
+            self.draw_perf_overlay()
             
-            pygame.display.flip()
-            self.clock.tick(FPS)
-        
+            self.present()
+            if self.lock_time is not None:
+                # Input-to-lock latency: from reading the press to the shot being on screen
+                self.profiler.record_latency((time.perf_counter() - self.lock_time) * 1000.0)
+                self.lock_time = None
+            self.profiler.end_work()
+            max_fps = self.settings.get("max_fps", FPS)
+            self.frame_time = min(self.clock.tick(max_fps) / 1000.0, MAX_FRAME_TIME)
+            self.profiler.end_frame(self.clock, 1000.0 / (max_fps or FPS))
+        
+        print(f"Frames: {self.active_frames} active, {self.idle_frames} idle")
+        if self.frame_timing_export:
+            self.export_frame_timing(self.frame_timing_export)
+        if self.input_player is not None:
+            print(f"Input replay (seed {self.seed}): {self.active_frames} frames "
+                  f"in {time.perf_counter() - started:.2f} s")
+            self.input_player.close()
+        if self.input_recorder is not None:
+            self.input_recorder.close()
+        # Write any settings change still waiting out the debounce delay
+        self.settings_writer.close()
+        self.close_replays()
         pygame.quit()
         sys.exit()
 
 if __name__ == "__main__":
-    game = PenaltyShootout()
+    parser = argparse.ArgumentParser(description="Penalty shootout")
+    parser.add_argument("--replay", metavar="FILE", help="play back a recorded match")
+    parser.add_argument("--seed", type=int, help="session RNG seed (overrides the rng_seed setting)")
+    parser.add_argument("--record-inputs", metavar="FILE", help="record this session's inputs")
+    parser.add_argument("--replay-inputs", metavar="FILE",
+                        help="re-run a recorded session frame for frame")
+    parser.add_argument("--frame-timing", metavar="FILE",
+                        help="export frame timings on exit (.csv per frame, .json summary)")
+    args = parser.parse_args()
+    
+    game = PenaltyShootout(args.seed, args.record_inputs, args.replay_inputs, args.frame_timing)
+    if args.replay:
+        game.start_replay(args.replay)
     game.run() 
\ No newline at end of file
@@ -0,0 +1,183 @@
+"""Compact binary replays of recorded shootouts.
+
+One file per match: a 16-byte header followed by one 13-byte record per
+kick, appended as each kick is resolved. Readers stream the records one
+at a time, so an archive of any size is never loaded whole.
+
+    header  <4sBBHQ  magic, version, difficulty, max_kicks, match seed
+    kick    <BdI     flags, power, kick seed
+
+flags packs the shooter (bit 0), in_net (bit 1), was_goal (bit 2), the
+shot direction (bits 3-4) and the keeper's dive (bits 5-6). The kick seed
+is what the engine's RNG was seeded with for that kick, so a replay can
+re-run every random decision and check it lands on the recorded result.
+
+    python replay.py replays/            # summarize every recorded match
+    python replay.py replays/<file>.psr  # list the kicks and verify them
+"""
+import argparse
+import os
+import struct
+from collections import namedtuple
+
+from shootout_engine import ShootoutEngine, SHOT_DIRECTIONS, PLAYER, CPU
+
+MAGIC = b"PSRP"
+VERSION = 1
+HEADER = struct.Struct("<4sBBHQ")
+KICK = struct.Struct("<BdI")
+DIFFICULTIES = ("easy", "normal", "hard")  # stored as an index; append only
+EXTENSION = ".psr"
+
+SHOOTER_CPU = 0x01
+IN_NET = 0x02
+WAS_GOAL = 0x04
+SHOT_SHIFT = 3
+KEEPER_SHIFT = 5
+DIRECTION_MASK = 0x03
+
+Kick = namedtuple("Kick", "shooter shot keeper_guess power seed in_net was_goal")
+
+
+def encode_kick(kick):
+    """Pack a Kick into its fixed-width record"""
+    flags = (SHOOTER_CPU if kick.shooter == CPU else 0) \
+        | (IN_NET if kick.in_net else 0) \
+        | (WAS_GOAL if kick.was_goal else 0) \
+        | SHOT_DIRECTIONS.index(kick.shot) << SHOT_SHIFT \
+        | SHOT_DIRECTIONS.index(kick.keeper_guess) << KEEPER_SHIFT
+    return KICK.pack(flags, kick.power, kick.seed)
+
+
+def decode_kick(record):
+    """Unpack one fixed-width record into a Kick"""
+    flags, power, seed = KICK.unpack(record)
+    return Kick(shooter=CPU if flags & SHOOTER_CPU else PLAYER,
+                shot=SHOT_DIRECTIONS[flags >> SHOT_SHIFT & DIRECTION_MASK],
+                keeper_guess=SHOT_DIRECTIONS[flags >> KEEPER_SHIFT & DIRECTION_MASK],
+                power=power,
+                seed=seed,
+                in_net=bool(flags & IN_NET),
+                was_goal=bool(flags & WAS_GOAL))
+
+
+def replay_filename(when):
+    """File name for a match started at datetime `when`"""
+    return when.strftime("%Y%m%d-%H%M%S-%f") + EXTENSION
+
+
+class ReplayWriter:
+    """Appends kicks of one match to a replay file as they happen"""
+
+    def __init__(self, path, difficulty, max_kicks=5, seed=0):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, DIFFICULTIES.index(difficulty), max_kicks, seed))
+        self.kicks = 0
+
+    def write_kick(self, kick):
+        self.file.write(encode_kick(kick))
+        # Flush per kick so a crash loses at most the kick in flight
+        self.file.flush()
+        self.kicks += 1
+
+    def close(self):
+        self.file.close()
+
+
+class ReplayReader:
+    """Streams the kicks of one replay file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        magic, version, difficulty, self.max_kicks, self.seed = HEADER.unpack(self.file.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            self.file.close()
+            raise ValueError(f"{path} is not a version {VERSION} replay")
+        self.difficulty = DIFFICULTIES[difficulty]
+
+    def __iter__(self):
+        while True:
+            record = self.file.read(KICK.size)
+            if len(record) < KICK.size:
+                # End of file (a torn final record from a crash is ignored)
+                return
+            yield decode_kick(record)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_replays(directory):
+    """Paths of the replays in `directory`, oldest first"""
+    try:
+        names = sorted(os.listdir(directory))
+    except FileNotFoundError:
+        return
+    for name in names:
+        if name.endswith(EXTENSION):
+            yield os.path.join(directory, name)
+
+
+def replay_match(path):
+    """Re-run a recorded match headlessly; returns (engine, kicks, divergences)
+
+    Each kick re-seeds the engine with its recorded seed and makes the same
+    engine calls as the game, so every dive, shot pick and save roll is
+    drawn again. A divergence is a kick whose re-run differs from the file.
+    """
+    divergences = []
+    kicks = 0
+    with ReplayReader(path) as reader:
+        engine = ShootoutEngine(reader.difficulty, max_kicks=reader.max_kicks)
+        for kick in reader:
+            engine.seed_kick(kick.seed)
+            if kick.shooter == PLAYER:
+                keeper_guess = engine.cpu_keeper_dive(kick.shot, kick.power)
+                was_goal = engine.resolve_player_shot(kick.shot, keeper_guess, kick.power, kick.in_net)
+                matches = keeper_guess == kick.keeper_guess
+            else:
+                shot = engine.cpu_pick_shot()
+                was_goal = engine.resolve_cpu_shot(shot, kick.keeper_guess, kick.in_net)
+                matches = shot == kick.shot
+            if not matches or was_goal != kick.was_goal:
+                divergences.append(kicks)
+            engine.end_of_kick(kick.shooter, was_goal)
+            kicks += 1
+    return engine, kicks, divergences
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and verify shootout replays")
+    parser.add_argument("path", nargs="?", default="replays", help="replay file or directory")
+    args = parser.parse_args()
+
+    if os.path.isdir(args.path):
+        for path in iter_replays(args.path):
+            engine, kicks, divergences = replay_match(path)
+            status = "ok" if not divergences else f"DIVERGED at kicks {divergences}"
+            print(f"{os.path.basename(path)}: {engine.difficulty} {engine.user_score}-{engine.computer_score} "
+                  f"in {kicks} kicks ({status})")
+        return
+
+    with ReplayReader(args.path) as reader:
+        print(f"{reader.difficulty}, {reader.max_kicks} kicks each, match seed {reader.seed}")
+        for number, kick in enumerate(reader, 1):
+            result = "GOAL" if kick.was_goal else ("saved" if kick.in_net else "wide")
+            print(f"{number:3} {kick.shooter:6} {kick.shot:6} keeper {kick.keeper_guess:6} "
+                  f"power {kick.power:.2f} seed {kick.seed:>10}  {result}")
+    engine, kicks, divergences = replay_match(args.path)
+    print(f"Final {engine.user_score}-{engine.computer_score}; "
+          + ("replay verified" if not divergences else f"diverged at kicks {divergences}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Debounced, background settings persistence.
+
+The settings screen saves on every click; SettingsWriter takes a copy of
+the settings, and a background thread writes the newest copy once no new
+change has arrived for `delay` seconds (and once more on close), using
+an atomic replace so a crash never leaves a half-written file.
+"""
+import json
+import threading
+
+from stats_store import atomic_write
+
+SAVE_DELAY = 0.5  # seconds of quiet before pending settings are written
+
+
+class SettingsWriter:
+    """Coalesces settings saves and flushes them off the render thread"""
+
+    def __init__(self, path, delay=SAVE_DELAY):
+        self.path = path
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.pending = None            # newest unsaved settings snapshot
+        self.changed = threading.Event()
+        self.closed = False
+        self.writes = 0                # files actually written (for diagnostics)
+        self.thread = threading.Thread(target=self.run, name="settings-writer", daemon=True)
+        self.thread.start()
+
+    def save(self, settings):
+        """Queue a save; returns immediately"""
+        with self.lock:
+            self.pending = dict(settings)
+        self.changed.set()
+
+    def run(self):
+        while not self.closed:
+            self.changed.wait()
+            # Debounce: keep waiting while changes keep arriving
+            while not self.closed:
+                self.changed.clear()
+                if not self.changed.wait(self.delay):
+                    break
+            self.flush()
+
+    def flush(self):
+        """Write the pending snapshot now (no-op if nothing changed)"""
+        with self.lock:
+            settings, self.pending = self.pending, None
+        if settings is None:
+            return
+        try:
+            atomic_write(self.path, lambda f: json.dump(settings, f, indent=2))
+            self.writes += 1
+        except OSError as e:
+            print(f"Warning: Could not save settings: {e}")
+
+    def close(self):
+        """Stop the thread and write anything still pending"""
+        self.closed = True
+        self.changed.set()
+        self.thread.join()
+        self.flush()
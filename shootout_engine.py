@@ -0,0 +1,265 @@
+"""Display-free penalty shootout rules.
+
+ShootoutEngine owns the match state (scores, kicks, per-kick results,
+sudden death) and every rule decision the Pygame front end makes, so a
+whole match can also be stepped without opening a window.
+"""
+import math
+import random
+from functools import lru_cache
+
+from keeper_ai import KEEPER_AIS
+
+SHOT_DIRECTIONS = ["left", "center", "right"]
+
+# Difficulty settings
+DIFFICULTY_SETTINGS = {
+    "easy": {
+        # CPU almost never saves your shots (10% chance to save)
+        "cpu_guess_accuracy": 0.10,
+        # You almost always save CPU shots (90% dive correctly)
+        "player_guess_accuracy": 0.90,
+        "keeper_ai": "flat",
+    },
+    "normal": {
+        # 40% chance CPU guesses your shot
+        "cpu_guess_accuracy": 0.40,
+        # 40% chance you guess CPU shot
+        "player_guess_accuracy": 0.40,
+        "keeper_ai": "flat",
+    },
+    "hard": {
+        # 60% chance CPU guesses your shot
+        "cpu_guess_accuracy": 0.60,
+        # 60% chance you guess CPU shot
+        "player_guess_accuracy": 0.60,
+        # when the CPU keeper misreads a shot it falls back on your habits
+        "keeper_ai": "adaptive",
+    }
+}
+
+PLAYER = "player"
+CPU = "cpu"
+
+
+class ShootoutEngine:
+    """Rules and state of a single shootout, independent of rendering"""
+
+    def __init__(self, difficulty="normal", max_kicks=5, rng=None, difficulty_settings=None, keeper_ai=None):
+        # rng only needs random() and choice(); defaults to the global random module
+        self.rng = rng if rng is not None else random
+        self.difficulty_settings = difficulty_settings or DIFFICULTY_SETTINGS
+        self.keeper_ai = keeper_ai  # KEEPER_AIS name; None = the difficulty's choice
+        self.initial_max_kicks = max_kicks
+        self.reset(difficulty)
+
+    def reset(self, difficulty=None):
+        """Start a fresh match (optionally switching difficulty)"""
+        if difficulty is not None:
+            self.difficulty = difficulty
+        self.user_score = 0
+        self.computer_score = 0
+        self.player_kicks = 0      # how many kicks the player has taken
+        self.cpu_kicks = 0         # how many kicks the CPU has taken
+        self.max_kicks = self.initial_max_kicks
+        self.sudden_death = False  # flag for sudden-death mode
+
+        # per-kick results: True=goal, False=miss
+        self.player_results = []
+        self.cpu_results = []
+
+        self.shooter = PLAYER      # who takes the next kick
+        self.game_over = False
+        
+        # CPU keeper model (learns within a match, so replays re-run it exactly)
+        keeper_ai = self.keeper_ai or self.settings.get("keeper_ai", "flat")
+        self.keeper = KEEPER_AIS[keeper_ai](SHOT_DIRECTIONS)
+
+    def seed_kick(self, seed):
+        """Give the next kick its own RNG stream so a replay can re-run it from the seed"""
+        self.rng = random.Random(seed)
+
+    @property
+    def settings(self):
+        return self.difficulty_settings[self.difficulty]
+
+    @property
+    def winner(self):
+        """PLAYER, CPU or None (tie / unfinished)"""
+        if self.user_score > self.computer_score:
+            return PLAYER
+        if self.computer_score > self.user_score:
+            return CPU
+        return None
+
+    def player_goal_probability(self, power):
+        """Chance the player's kick scores: keeper must dive right and win the save roll"""
+        return 1.0 - self.keeper_read_chance(power) * self.save_chance(power)
+
+    def keeper_read_chance(self, power):
+        """Chance the CPU keeper dives the right way, from its model's current state"""
+        return self.keeper.read_chance(power, self.settings["cpu_guess_accuracy"])
+
+    def cpu_goal_probability(self):
+        """Chance the CPU's kick scores against the (headless) user dive"""
+        return 1.0 - self.settings["player_guess_accuracy"]
+
+    def win_probability(self, power):
+        """Exact (win, loss, expected remaining kicks) from the current state
+
+        Assumes the player keeps shooting with `power` and the keeper keeps its
+        current read of the player (see keeper_read_chance). The lead comes from the
+        recorded kicks so a kick that is scored but not yet recorded is ignored.
+        """
+        lead = sum(self.player_results) - sum(self.cpu_results)
+        return win_probability(self.player_goal_probability(power), self.cpu_goal_probability(),
+                               self.max_kicks, self.player_kicks, self.cpu_kicks, lead)
+
+    def save_chance(self, power):
+        """CPU keeper's save roll for a shot struck with the given power"""
+        base_save = self.settings["cpu_guess_accuracy"]
+        # reduce save chance by up to 50% at full power
+        modifier = 1.0 - (power * 0.5)
+        # → at p=0   → modifier=1.0  (no change)
+        # → at p=1.0 → modifier=0.5  (halved save chance)
+        return base_save * modifier
+
+    def dive(self, shot, accuracy):
+        """Keeper dive: the shot direction with probability `accuracy`, else a wrong side"""
+        if self.rng.random() < accuracy:
+            return shot
+        wrong = [d for d in SHOT_DIRECTIONS if d != shot]
+        return self.rng.choice(wrong)
+
+    def cpu_keeper_dive(self, shot, power=0.0):
+        """CPU picks a dive direction based on difficulty and its keeper model"""
+        return self.keeper.dive(shot, power, self.settings["cpu_guess_accuracy"], self.rng)
+
+    def player_keeper_dive(self, shot):
+        """Headless stand-in for the user's dive when the CPU shoots"""
+        return self.dive(shot, self.settings["player_guess_accuracy"])
+
+    def cpu_pick_shot(self):
+        """CPU randomly picks a direction (not influenced by player's choice)"""
+        return self.rng.choice(SHOT_DIRECTIONS)
+
+    def resolve_player_shot(self, shot, keeper_guess, power, in_net=True):
+        """Resolve the player's kick, updating the score; returns True on a goal"""
+        self.keeper.observe(shot, power)
+        if not in_net:
+            return False
+        # When the ball crosses the line the keeper still has to win the save roll
+        if self.rng.random() < self.save_chance(power) and shot == keeper_guess:
+            return False
+        self.user_score += 1
+        return True
+
+    def resolve_cpu_shot(self, shot, keeper_guess, in_net=True):
+        """Resolve the CPU's kick against the user's dive; returns True on a goal"""
+        if not in_net or shot == keeper_guess:
+            return False
+        self.computer_score += 1
+        return True
+
+    def end_of_kick(self, shooter, was_goal):
+        """Record a finished kick and apply shootout rules; returns True when the match is over"""
+        # 1) count the kick and record result
+        if shooter == PLAYER:
+            self.player_kicks += 1
+            self.player_results.append(was_goal)
+        else:
+            self.cpu_kicks += 1
+            self.cpu_results.append(was_goal)
+
+        # 2) check insurmountable lead
+        lead = self.user_score - self.computer_score
+        if lead > 0:
+            # player leads by `lead`; CPU has (max_kicks - cpu_kicks) kicks left
+            if lead > (self.max_kicks - self.cpu_kicks):
+                self.game_over = True
+                return True
+        elif lead < 0:
+            # CPU leads; player has (max_kicks - player_kicks) kicks left
+            if -lead > (self.max_kicks - self.player_kicks):
+                self.game_over = True
+                return True
+
+        # 3) after five each, if tied → sudden death
+        if self.player_kicks == self.max_kicks and self.cpu_kicks == self.max_kicks:
+            if self.user_score != self.computer_score:
+                self.game_over = True
+                return True
+            self.sudden_death = True
+
+        # 4) pick next shooter (always alternate)
+        self.shooter = CPU if shooter == PLAYER else PLAYER
+        return False
+
+    def step(self, shot=None, power=None):
+        """Play the next kick headlessly; returns True on a goal
+
+        The player's shot direction and power are random unless given.
+        """
+        if self.shooter == PLAYER:
+            shooter = PLAYER
+            if shot is None:
+                shot = self.rng.choice(SHOT_DIRECTIONS)
+            if power is None:
+                power = self.rng.random()
+            was_goal = self.resolve_player_shot(shot, self.cpu_keeper_dive(shot, power), power)
+        else:
+            shooter = CPU
+            shot = self.cpu_pick_shot()
+            was_goal = self.resolve_cpu_shot(shot, self.player_keeper_dive(shot))
+        self.end_of_kick(shooter, was_goal)
+        return was_goal
+
+    def play_match(self, max_total_kicks=1000):
+        """Step kicks until the match ends; returns the winner (None for an unfinished tie)"""
+        kicks = 0
+        while not self.game_over and kicks < max_total_kicks:
+            self.step()
+            kicks += 1
+        return self.winner
+
+
+def is_over(player_kicks, cpu_kicks, lead, max_kicks):
+    """Same termination test as ShootoutEngine.end_of_kick"""
+    if lead > 0 and lead > max_kicks - cpu_kicks:
+        return True
+    if lead < 0 and -lead > max_kicks - player_kicks:
+        return True
+    return player_kicks == max_kicks and cpu_kicks == max_kicks and lead != 0
+
+
+@lru_cache(maxsize=65536)
+def win_probability(p_player, p_cpu, max_kicks=5, player_kicks=0, cpu_kicks=0, lead=0):
+    """Exact (win, loss, expected remaining kicks) for a shootout state
+
+    p_player / p_cpu are per-kick scoring probabilities. The player always
+    kicks next whenever it has not taken more kicks than the CPU.
+    """
+    if is_over(player_kicks, cpu_kicks, lead, max_kicks):
+        return (1.0, 0.0, 0.0) if lead > 0 else (0.0, 1.0, 0.0)
+
+    if player_kicks == cpu_kicks and player_kicks >= max_kicks:
+        # Level in sudden death: a player goal wins at once, then a CPU goal loses;
+        # two misses return to this same state, so solve the geometric series
+        g, h = p_player, p_cpu
+        repeat = (1.0 - g) * (1.0 - h)
+        if repeat >= 1.0:
+            return (0.0, 0.0, math.inf)  # nobody can ever score
+        return (g / (1.0 - repeat), (1.0 - g) * h / (1.0 - repeat), (2.0 - g) / (1.0 - repeat))
+
+    if player_kicks <= cpu_kicks:
+        p = p_player
+        scored = win_probability(p_player, p_cpu, max_kicks, player_kicks + 1, cpu_kicks, lead + 1)
+        missed = win_probability(p_player, p_cpu, max_kicks, player_kicks + 1, cpu_kicks, lead)
+    else:
+        p = p_cpu
+        scored = win_probability(p_player, p_cpu, max_kicks, player_kicks, cpu_kicks + 1, lead - 1)
+        missed = win_probability(p_player, p_cpu, max_kicks, player_kicks, cpu_kicks + 1, lead)
+
+    return (p * scored[0] + (1.0 - p) * missed[0],
+            p * scored[1] + (1.0 - p) * missed[1],
+            1.0 + p * scored[2] + (1.0 - p) * missed[2])
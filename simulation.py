@@ -0,0 +1,182 @@
+"""Batched Monte Carlo shootout simulator for difficulty balancing.
+
+Runs N matches at once as NumPy arrays using the same rules as
+ShootoutEngine (shot resolution and end_of_kick's early termination and
+sudden death), so a grid of difficulty parameters can be swept in
+seconds. Needs NumPy, which the game itself does not.
+
+The arrays model the "flat" keeper only. A difficulty with any other
+keeper_ai (hard's adaptive keeper learns within a match) is reported by
+playing ShootoutEngine matches one at a time instead, which is slower
+but uses the real keeper.
+
+    python simulation.py --matches 200000
+    python simulation.py --sweep --matches 50000
+"""
+import argparse
+import itertools
+import random
+
+import numpy as np
+
+from shootout_engine import DIFFICULTY_SETTINGS, ShootoutEngine
+
+POWER_SLOPE = 0.5        # save chance modifier is 1.0 - power * POWER_SLOPE
+MAX_TOTAL_KICKS = 200    # cap on kicks per match (sudden death is otherwise unbounded)
+
+
+def simulate_matches(n, cpu_guess_accuracy, player_guess_accuracy, power=None,
+                     power_slope=POWER_SLOPE, max_kicks=5, max_total_kicks=MAX_TOTAL_KICKS,
+                     seed=None):
+    """Simulate n matches in lockstep and return summary statistics
+
+    power is the player's shot power; None draws it uniformly per kick like
+    ShootoutEngine.step does. The CPU keeper is the flat one: a misread
+    always dives to a wrong side.
+    """
+    rng = np.random.default_rng(seed)
+
+    user_score = np.zeros(n, dtype=np.int32)
+    cpu_score = np.zeros(n, dtype=np.int32)
+    sudden_death = np.zeros(n, dtype=bool)
+    length = np.zeros(n, dtype=np.int32)   # total kicks when the match ended
+    active = np.arange(n)                   # indices of matches still running
+
+    for kick in range(max_total_kicks):
+        if active.size == 0:
+            break
+        m = active.size
+        # Kicks taken so far are identical for every live match (strict alternation)
+        player_kicks = (kick + 2) // 2
+        cpu_kicks = (kick + 1) // 2
+
+        if kick % 2 == 0:
+            # Player shoots: keeper must dive correctly and then win the save roll
+            shot_power = rng.random(m) if power is None else power
+            dive_right = rng.random(m) < cpu_guess_accuracy
+            saved = dive_right & (rng.random(m) < cpu_guess_accuracy * (1.0 - shot_power * power_slope))
+            user_score[active] += ~saved
+        else:
+            # CPU shoots: goal unless the user dives the right way
+            saved = rng.random(m) < player_guess_accuracy
+            cpu_score[active] += ~saved
+
+        # end_of_kick: insurmountable lead, then the level-after-max_kicks check
+        lead = user_score[active] - cpu_score[active]
+        over = (((lead > 0) & (lead > max_kicks - cpu_kicks))
+                | ((lead < 0) & (-lead > max_kicks - player_kicks)))
+        if player_kicks == max_kicks and cpu_kicks == max_kicks:
+            over |= lead != 0
+            sudden_death[active[~over]] = True
+
+        ended = active[over]
+        length[ended] = kick + 1
+        active = active[~over]
+
+    # Matches still running hit the kick cap and count as unfinished
+    length[active] = max_total_kicks
+    finished = np.ones(n, dtype=bool)
+    finished[active] = False
+
+    wins = int(np.count_nonzero(finished & (user_score > cpu_score)))
+    losses = int(np.count_nonzero(finished & (cpu_score > user_score)))
+    return summarize(n, wins, losses, int(np.count_nonzero(sudden_death)), length, max_kicks)
+
+
+def summarize(n, wins, losses, sudden_deaths, length, max_kicks):
+    """Result dict shared by both simulators; length is each match's kick count"""
+    return {
+        "matches": n,
+        "win_rate": wins / n,
+        "loss_rate": losses / n,
+        "unfinished_rate": (n - wins - losses) / n,
+        "sudden_death_rate": sudden_deaths / n,
+        "mean_kicks": float(length.mean()),
+        "kick_distribution": np.bincount(length, minlength=2 * max_kicks + 1).tolist(),
+    }
+
+
+def engine_matches(n, difficulty, difficulty_settings=DIFFICULTY_SETTINGS, power=None,
+                   max_kicks=5, max_total_kicks=MAX_TOTAL_KICKS, seed=None):
+    """Play n matches through ShootoutEngine; same result dict as simulate_matches
+
+    Used for keepers the arrays can't model (their dive depends on the
+    match so far). Much slower, but exactly the game's rules and keeper.
+    """
+    engine = ShootoutEngine(difficulty, max_kicks=max_kicks, rng=random.Random(seed),
+                            difficulty_settings=difficulty_settings)
+    length = np.zeros(n, dtype=np.int32)
+    wins = losses = sudden_deaths = 0
+    for i in range(n):
+        engine.reset()
+        kicks = 0
+        while not engine.game_over and kicks < max_total_kicks:
+            engine.step(power=power)
+            kicks += 1
+        length[i] = kicks
+        sudden_deaths += engine.sudden_death
+        if engine.game_over:
+            # play_match's winner: an unfinished match stays level
+            wins += engine.user_score > engine.computer_score
+            losses += engine.computer_score > engine.user_score
+    return summarize(n, wins, losses, sudden_deaths, length, max_kicks)
+
+
+def difficulty_report(n, difficulty_settings=DIFFICULTY_SETTINGS, power=None, seed=None):
+    """Results for every configured difficulty
+
+    Flat-keeper difficulties use the batched simulate_matches, the rest
+    engine_matches (result["simulator"] says which).
+    """
+    report = {}
+    for name, s in difficulty_settings.items():
+        if s.get("keeper_ai", "flat") == "flat":
+            result = simulate_matches(n, s["cpu_guess_accuracy"], s["player_guess_accuracy"],
+                                      power=power, seed=seed)
+            result["simulator"] = "batched"
+        else:
+            result = engine_matches(n, name, difficulty_settings, power=power, seed=seed)
+            result["simulator"] = "engine"
+        report[name] = result
+    return report
+
+
+def sweep(n, cpu_values, player_values, powers=(None,), power_slopes=(POWER_SLOPE,), seed=None):
+    """Simulate every combination of the given parameters; returns a list of result dicts"""
+    results = []
+    for cpu_acc, player_acc, power, slope in itertools.product(cpu_values, player_values,
+                                                                powers, power_slopes):
+        result = simulate_matches(n, cpu_acc, player_acc, power=power, power_slope=slope, seed=seed)
+        result.update(cpu_guess_accuracy=cpu_acc, player_guess_accuracy=player_acc,
+                      power=power, power_slope=slope)
+        results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo penalty shootout balancing")
+    parser.add_argument("--matches", type=int, default=100000, help="matches per configuration")
+    parser.add_argument("--power", type=float, default=None, help="fixed shot power (default: uniform)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--sweep", action="store_true",
+                        help="sweep guess accuracies from 0.1 to 0.9 instead of the difficulty presets (flat keeper)")
+    args = parser.parse_args()
+
+    if args.sweep:
+        grid = [round(0.1 * i, 1) for i in range(1, 10)]
+        print("cpu   you   win%   loss%  sd%    kicks")
+        for r in sweep(args.matches, grid, grid, powers=(args.power,), seed=args.seed):
+            print(f"{r['cpu_guess_accuracy']:.1f}   {r['player_guess_accuracy']:.1f}   "
+                  f"{r['win_rate']*100:5.1f}  {r['loss_rate']*100:5.1f}  "
+                  f"{r['sudden_death_rate']*100:5.1f}  {r['mean_kicks']:.2f}")
+        return
+
+    for name, r in difficulty_report(args.matches, power=args.power, seed=args.seed).items():
+        print(f"{name.title()}: win {r['win_rate']*100:.1f}% | loss {r['loss_rate']*100:.1f}% | "
+              f"sudden death {r['sudden_death_rate']*100:.1f}% | mean kicks {r['mean_kicks']:.2f} "
+              f"({r['simulator']})")
+        print(f"  kicks per match: {r['kick_distribution']}")
+
+
+if __name__ == "__main__":
+    main()
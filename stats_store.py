@@ -0,0 +1,669 @@
+"""Append-only game statistics storage.
+
+Every finished game is appended as one JSON line to the game log, and
+the win/loss/tie counters live in a small summary file that is replaced
+atomically. Recording a game therefore costs the same no matter how
+long the history is. A legacy game_stats.json is imported on first use.
+
+SqliteStatsStore is an optional drop-in backend (settings
+"stats_backend": "sqlite") with indexed per-difficulty, per-date and
+per-accuracy queries.
+
+    python stats_store.py compact [--keep N]
+    python stats_store.py migrate [--db game_stats.db]
+
+Both stores can hand out pages of history (newest first) without
+loading the rest: the JSON Lines log keeps a sidecar index of record
+offsets, SQLite uses its rowid.
+"""
+import argparse
+import json
+import math
+import os
+import sqlite3
+import struct
+from collections import deque
+from datetime import datetime
+
+DEFAULT_LOG = "game_stats.jsonl"
+DEFAULT_DB = "game_stats.db"
+LEGACY_FILE = "game_stats.json"
+
+# Columns written by PenaltyShootout.record_game_stats, in table order
+GAME_COLUMNS = ["date", "difficulty", "player_score", "cpu_score", "player_kicks",
+                "cpu_kicks", "sudden_death", "forfeited", "player_accuracy"]
+BOOL_COLUMNS = {"sudden_death", "forfeited"}
+INSERT_BATCH = 5000
+
+# Log index: 8-byte header with the log size it covers, then one 8-byte offset per record
+INDEX_ENTRY = struct.Struct("<q")
+
+
+def empty_summary():
+    return {"total_games": 0, "wins": 0, "losses": 0, "ties": 0}
+
+
+def game_outcome(game):
+    """'wins', 'losses' or 'ties' for a recorded game"""
+    if game["player_score"] > game["cpu_score"]:
+        return "wins"
+    if game["cpu_score"] > game["player_score"]:
+        return "losses"
+    return "ties"
+
+
+class StatsAggregates:
+    """Rolling statistics updated in O(1) per recorded game
+
+    Per-difficulty results, running mean/variance of player_accuracy
+    (Welford), sudden-death and forfeit counts, streaks and the form over
+    the last FORM_WINDOWS games. Serialized next to the summary counters
+    so the stats screen never has to scan the history.
+    """
+
+    FORM_WINDOWS = (50, 500)
+    OUTCOME_LETTERS = {"wins": "W", "losses": "L", "ties": "T"}
+
+    def __init__(self, data=None):
+        data = data or {}
+        self.total_games = data.get("total_games", 0)
+        self.by_difficulty = data.get("by_difficulty", {})
+        self.accuracy_mean = data.get("accuracy_mean", 0.0)
+        self.accuracy_m2 = data.get("accuracy_m2", 0.0)
+        self.sudden_deaths = data.get("sudden_deaths", 0)
+        self.forfeits = data.get("forfeits", 0)
+        self.streak_outcome = data.get("streak_outcome")  # "W", "L", "T" or None
+        self.streak_length = data.get("streak_length", 0)
+        self.best_win_streak = data.get("best_win_streak", 0)
+
+        # Sliding windows: ring buffers of outcome letters plus running win counts
+        recent = data.get("recent", "")
+        self.windows = {size: deque(recent[-size:], maxlen=size) for size in self.FORM_WINDOWS}
+        self.window_wins = {size: window.count("W") for size, window in self.windows.items()}
+
+    @classmethod
+    def from_games(cls, games):
+        aggregates = cls()
+        for game in games:
+            aggregates.add(game)
+        return aggregates
+
+    def add(self, game):
+        """Fold one finished game into every aggregate"""
+        outcome = game_outcome(game)
+        letter = self.OUTCOME_LETTERS[outcome]
+        self.total_games += 1
+
+        counts = self.by_difficulty.setdefault(game["difficulty"], empty_summary())
+        counts["total_games"] += 1
+        counts[outcome] += 1
+
+        # Welford's online mean/variance
+        accuracy = game.get("player_accuracy", 0.0)
+        delta = accuracy - self.accuracy_mean
+        self.accuracy_mean += delta / self.total_games
+        self.accuracy_m2 += delta * (accuracy - self.accuracy_mean)
+
+        self.sudden_deaths += bool(game.get("sudden_death"))
+        self.forfeits += bool(game.get("forfeited"))
+
+        if letter == self.streak_outcome:
+            self.streak_length += 1
+        else:
+            self.streak_outcome, self.streak_length = letter, 1
+        if letter == "W":
+            self.best_win_streak = max(self.best_win_streak, self.streak_length)
+
+        for size, window in self.windows.items():
+            if len(window) == size and window[0] == "W":
+                self.window_wins[size] -= 1  # oldest result is about to drop out
+            window.append(letter)
+            self.window_wins[size] += letter == "W"
+
+    def win_rate(self, difficulty=None):
+        counts = self.by_difficulty.get(difficulty) if difficulty else {
+            "total_games": self.total_games,
+            "wins": sum(c["wins"] for c in self.by_difficulty.values())}
+        if not counts or not counts["total_games"]:
+            return 0.0
+        return counts["wins"] / counts["total_games"]
+
+    @property
+    def accuracy_stddev(self):
+        if self.total_games < 2:
+            return 0.0
+        return math.sqrt(self.accuracy_m2 / (self.total_games - 1))
+
+    @property
+    def sudden_death_rate(self):
+        return self.sudden_deaths / self.total_games if self.total_games else 0.0
+
+    def form(self, size):
+        """Win rate over the last `size` games (size must be one of FORM_WINDOWS)"""
+        window = self.windows[size]
+        return self.window_wins[size] / len(window) if window else 0.0
+
+    def to_dict(self):
+        largest = max(self.FORM_WINDOWS)
+        return {
+            "total_games": self.total_games,
+            "by_difficulty": self.by_difficulty,
+            "accuracy_mean": self.accuracy_mean,
+            "accuracy_m2": self.accuracy_m2,
+            "sudden_deaths": self.sudden_deaths,
+            "forfeits": self.forfeits,
+            "streak_outcome": self.streak_outcome,
+            "streak_length": self.streak_length,
+            "best_win_streak": self.best_win_streak,
+            "recent": "".join(self.windows[largest]),
+        }
+
+
+def atomic_write(path, write):
+    """Write a file through a temp file + rename so readers never see a partial file"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_log(path):
+    """Yield the games in a JSON Lines log, skipping blank or torn lines"""
+    try:
+        with open(path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # partial write from a crash
+    except FileNotFoundError:
+        return
+
+
+class StatsStore:
+    """JSON Lines game log plus an atomically replaced summary file"""
+
+    def __init__(self, log_path=DEFAULT_LOG, summary_path=None, legacy_path=LEGACY_FILE):
+        self.log_path = log_path
+        self.summary_path = summary_path or os.path.splitext(log_path)[0] + "_summary.json"
+        self.index_path = os.path.splitext(log_path)[0] + ".idx"
+        self.legacy_path = legacy_path
+
+    def ensure_log(self):
+        """Import a legacy stats file the first time the log is needed"""
+        if not os.path.exists(self.log_path):
+            self.import_legacy()
+
+    def load_games(self):
+        self.ensure_log()
+        return list(read_log(self.log_path))
+
+    def read_summary_file(self):
+        try:
+            with open(self.summary_path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def load_summary(self, games=None):
+        """Read the summary file, rebuilding it from the log if it is missing or unreadable"""
+        self.ensure_log()
+        data = self.read_summary_file()
+        if data is not None:
+            return {key: data[key] for key in empty_summary()}
+        summary = self.summarize(read_log(self.log_path) if games is None else games)
+        if summary["total_games"]:
+            self.write_summary(summary)
+        return summary
+
+    @staticmethod
+    def summarize(games):
+        summary = empty_summary()
+        for game in games:
+            summary["total_games"] += 1
+            summary[game_outcome(game)] += 1
+        return summary
+
+    def load_aggregates(self):
+        """Stored StatsAggregates data, or None if it has never been written"""
+        return (self.read_summary_file() or {}).get("aggregates")
+
+    def write_aggregates(self, aggregates):
+        self.write_summary(self.load_summary(), aggregates)
+
+    def append(self, game, summary, aggregates=None):
+        """Append one game to the log and store the updated counters"""
+        line = json.dumps(game, separators=(",", ":")) + "\n"
+        with open(self.log_path, 'a+b') as f:
+            # Terminate a torn last line from a crash so this record stays parseable
+            if f.seek(0, os.SEEK_END) > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+            offset = f.tell()
+            f.write(line.encode())
+            f.flush()
+            os.fsync(f.fileno())
+            log_size = f.tell()
+        self.append_index(offset, log_size)
+        self.write_summary(summary, aggregates)
+
+    def index_is_current(self):
+        """Whether the index header matches the log size (cheap, no scan)"""
+        try:
+            with open(self.index_path, 'rb') as f:
+                header = f.read(INDEX_ENTRY.size)
+            return (len(header) == INDEX_ENTRY.size
+                    and INDEX_ENTRY.unpack(header)[0] == os.path.getsize(self.log_path))
+        except FileNotFoundError:
+            return False
+
+    def append_index(self, offset, log_size):
+        """Add one record offset to an existing index; a stale index is left for rebuild"""
+        try:
+            with open(self.index_path, 'r+b') as f:
+                header = f.read(INDEX_ENTRY.size)
+                if len(header) != INDEX_ENTRY.size or INDEX_ENTRY.unpack(header)[0] != offset:
+                    return  # index did not cover the log up to this record
+                f.seek(0, os.SEEK_END)
+                f.write(INDEX_ENTRY.pack(offset))
+                f.seek(0)
+                f.write(INDEX_ENTRY.pack(log_size))
+        except FileNotFoundError:
+            pass  # built lazily on first page request
+
+    def rebuild_index(self):
+        """Scan the log once, streaming record offsets into a fresh index"""
+        self.ensure_log()
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, 'wb') as out:
+            out.write(INDEX_ENTRY.pack(0))
+            size = 0
+            try:
+                with open(self.log_path, 'rb') as f:
+                    offset = 0
+                    for line in f:
+                        if line.strip():
+                            try:
+                                json.loads(line)
+                                out.write(INDEX_ENTRY.pack(offset))
+                            except json.JSONDecodeError:
+                                pass  # torn line from a crash
+                        offset += len(line)
+                    size = offset
+            except FileNotFoundError:
+                pass
+            out.seek(0)
+            out.write(INDEX_ENTRY.pack(size))
+        os.replace(tmp_path, self.index_path)
+
+    def count_games(self):
+        """Number of games in the log (from the index size)"""
+        if not self.index_is_current():
+            self.rebuild_index()
+        return os.path.getsize(self.index_path) // INDEX_ENTRY.size - 1
+
+    def load_page(self, offset, limit):
+        """Games [offset, offset + limit) counted from the newest, newest first"""
+        count = self.count_games()
+        first = count - 1 - offset   # record number of the newest game on the page
+        last = max(first - limit, -1)
+        games = []
+        if first < 0:
+            return games
+        with open(self.index_path, 'rb') as index, open(self.log_path, 'rb') as log:
+            for record in range(first, last, -1):
+                index.seek(INDEX_ENTRY.size * (record + 1))
+                log.seek(INDEX_ENTRY.unpack(index.read(INDEX_ENTRY.size))[0])
+                games.append(json.loads(log.readline()))
+        return games
+
+    def write_summary(self, summary, aggregates=None):
+        counters = {key: summary[key] for key in empty_summary()}
+        if aggregates is None:
+            # Keep previously stored aggregates when only the counters change
+            aggregates = self.load_aggregates()
+        if aggregates is not None:
+            counters["aggregates"] = aggregates
+        atomic_write(self.summary_path, lambda f: json.dump(counters, f, indent=2))
+
+    def write_log(self, games):
+        """Replace the whole log atomically"""
+        def write(f):
+            for game in games:
+                f.write(json.dumps(game, separators=(",", ":")) + "\n")
+        atomic_write(self.log_path, write)
+        if os.path.exists(self.index_path):
+            os.remove(self.index_path)  # offsets changed; rebuilt on next page request
+
+    def import_legacy(self):
+        """Convert a legacy game_stats.json into the log + summary format (left in place)"""
+        if not self.legacy_path or not os.path.exists(self.legacy_path):
+            return
+        with open(self.legacy_path, 'r') as f:
+            legacy = json.load(f)
+        self.write_log(legacy.get("games", []))
+        summary = empty_summary()
+        summary.update({key: legacy[key] for key in summary if key in legacy})
+        self.write_summary(summary)
+
+    def compact(self, keep=None):
+        """Rewrite the log without torn lines, optionally keeping only the newest `keep` games
+
+        The summary counters still cover every game ever played.
+        """
+        self.load_summary()  # make sure counters exist before history is dropped
+        games = list(read_log(self.log_path))
+        if keep is not None:
+            games = games[-keep:] if keep > 0 else []
+        self.write_log(games)
+        return len(games)
+
+
+class SqliteStatsStore:
+    """SQLite (WAL mode) game history with the same interface as StatsStore"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS games (
+            id INTEGER PRIMARY KEY,
+            date TEXT NOT NULL,
+            difficulty TEXT NOT NULL,
+            player_score INTEGER NOT NULL,
+            cpu_score INTEGER NOT NULL,
+            player_kicks INTEGER NOT NULL,
+            cpu_kicks INTEGER NOT NULL,
+            sudden_death INTEGER NOT NULL,
+            forfeited INTEGER NOT NULL,
+            player_accuracy REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_games_date ON games(date);
+        CREATE INDEX IF NOT EXISTS idx_games_difficulty ON games(difficulty);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, db_path=DEFAULT_DB, migrate_from=None):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        if migrate_from is not None and not self.is_migrated():
+            self.migrate(migrate_from)
+
+    @staticmethod
+    def to_row(game):
+        return tuple(int(game.get(c, False)) if c in BOOL_COLUMNS else game.get(c, 0)
+                     for c in GAME_COLUMNS)
+
+    @staticmethod
+    def to_game(row):
+        return {c: bool(v) if c in BOOL_COLUMNS else v for c, v in zip(GAME_COLUMNS, row)}
+
+    INSERT_SQL = (f"INSERT INTO games ({', '.join(GAME_COLUMNS)}) "
+                  f"VALUES ({', '.join('?' * len(GAME_COLUMNS))})")
+    AGGREGATES_SQL = "INSERT OR REPLACE INTO meta (key, value) VALUES ('aggregates', ?)"
+
+    def append(self, game, summary=None, aggregates=None):
+        """Insert one game and its aggregates in one transaction
+
+        Counters are derived from the table, so summary is unused.
+        """
+        with self.conn:
+            self.conn.execute(self.INSERT_SQL, self.to_row(game))
+            if aggregates is not None:
+                self.conn.execute(self.AGGREGATES_SQL, (json.dumps(aggregates),))
+
+    def write_aggregates(self, aggregates):
+        with self.conn:
+            self.conn.execute(self.AGGREGATES_SQL, (json.dumps(aggregates),))
+
+    def load_aggregates(self):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'aggregates'").fetchone()
+        return json.loads(row[0]) if row else None
+
+    def append_many(self, games, transaction=True):
+        """Insert games in batches of INSERT_BATCH rows, one transaction per batch
+
+        With transaction=False nothing is committed; the caller's transaction covers it.
+        """
+        sql = self.INSERT_SQL
+        batch = []
+        for game in games:
+            batch.append(self.to_row(game))
+            if len(batch) >= INSERT_BATCH:
+                self.insert_batch(batch, transaction)
+                batch = []
+        if batch:
+            self.insert_batch(batch, transaction)
+
+    def insert_batch(self, rows, transaction):
+        if transaction:
+            with self.conn:
+                self.conn.executemany(self.INSERT_SQL, rows)
+        else:
+            self.conn.executemany(self.INSERT_SQL, rows)
+
+    def is_migrated(self):
+        """Whether a migration has been committed to this database
+
+        Databases written before migrations were marked, and so holding games
+        without the marker, count as migrated as they always did.
+        """
+        if self.conn.execute("SELECT 1 FROM meta WHERE key = 'migrated'").fetchone():
+            return True
+        return self.count_games() > 0
+
+    def migrate(self, source):
+        """Copy every game from a JSON store (log or legacy file) into this database
+
+        A compacted log no longer holds every game its summary counts, so the
+        difference is kept as a baseline that load_summary adds to the table's
+        counts. The source's aggregates are carried over for the same reason.
+        Everything is one transaction ending with the 'migrated' marker, so an
+        interrupted migration leaves nothing behind and runs again next time.
+        """
+        source.ensure_log()
+        summary = source.load_summary()
+        aggregates = source.load_aggregates()
+        with self.conn:
+            self.append_many(read_log(source.log_path), transaction=False)
+            copied = self.load_summary()
+            baseline = {key: summary[key] - copied[key] for key in summary}
+            if any(baseline.values()):
+                self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('summary_baseline', ?)",
+                                  (json.dumps(baseline),))
+            if aggregates is not None:
+                self.conn.execute(self.AGGREGATES_SQL, (json.dumps(aggregates),))
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated', ?)",
+                              (datetime.now().isoformat(timespec="seconds"),))
+
+    def load_summary(self):
+        """Counters from the table, plus games dropped from a compacted log before migration"""
+        row = self.conn.execute(
+            "SELECT COUNT(*), SUM(player_score > cpu_score), SUM(player_score < cpu_score) FROM games"
+        ).fetchone()
+        total, wins, losses = row[0], row[1] or 0, row[2] or 0
+        summary = {"total_games": total, "wins": wins, "losses": losses, "ties": total - wins - losses}
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'summary_baseline'").fetchone()
+        if row:
+            for key, count in json.loads(row[0]).items():
+                summary[key] += count
+        return summary
+
+    def load_games(self):
+        cursor = self.conn.execute(f"SELECT {', '.join(GAME_COLUMNS)} FROM games ORDER BY id")
+        return [self.to_game(row) for row in cursor]
+
+    def recent(self, count):
+        """Newest `count` games, oldest first, without loading the whole table"""
+        cursor = self.conn.execute(
+            f"SELECT {', '.join(GAME_COLUMNS)} FROM games ORDER BY id DESC LIMIT ?", (count,))
+        return [self.to_game(row) for row in cursor][::-1]
+
+    def count_games(self):
+        return self.conn.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+
+    def load_page(self, offset, limit):
+        """Games [offset, offset + limit) counted from the newest, newest first
+
+        Rows are only ever inserted, so rowids are dense and the page is a
+        primary-key range scan rather than an OFFSET skip.
+        """
+        top = self.conn.execute("SELECT MAX(id) FROM games").fetchone()[0] or 0
+        cursor = self.conn.execute(
+            f"SELECT {', '.join(GAME_COLUMNS)} FROM games WHERE id <= ? ORDER BY id DESC LIMIT ?",
+            (top - offset, limit))
+        return [self.to_game(row) for row in cursor]
+
+    def breakdown_by_difficulty(self):
+        """{difficulty: {"games", "wins", "losses", "ties", "avg_accuracy"}}"""
+        cursor = self.conn.execute("""
+            SELECT difficulty, COUNT(*), SUM(player_score > cpu_score),
+                   SUM(player_score < cpu_score), AVG(player_accuracy)
+            FROM games GROUP BY difficulty
+        """)
+        return {d: {"games": n, "wins": w, "losses": l, "ties": n - w - l, "avg_accuracy": acc}
+                for d, n, w, l, acc in cursor}
+
+    def breakdown_by_date(self, start=None, end=None):
+        """Per-day [(day, games, wins, avg_accuracy)], optionally for start <= date < end"""
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("date >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("date < ?")
+            params.append(end)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self.conn.execute(f"""
+            SELECT substr(date, 1, 10) AS day, COUNT(*), SUM(player_score > cpu_score),
+                   AVG(player_accuracy)
+            FROM games {where} GROUP BY day ORDER BY day
+        """, params).fetchall()
+
+    def accuracy_histogram(self, bins=10, difficulty=None):
+        """Game counts per player_accuracy bucket ([0, 1/bins), ..., [1 - 1/bins, 1])"""
+        sql = "SELECT MIN(CAST(player_accuracy * ? AS INTEGER), ? - 1), COUNT(*) FROM games"
+        params = [bins, bins]
+        if difficulty is not None:
+            sql += " WHERE difficulty = ?"
+            params.append(difficulty)
+        counts = [0] * bins
+        for bucket, n in self.conn.execute(sql + " GROUP BY 1", params):
+            counts[bucket] = n
+        return counts
+
+    def close(self):
+        self.conn.close()
+
+
+class StatsRepository:
+    """In-memory view of the stats, loaded lazily and written through to a StatsStore
+
+    The summary file is read the first time counters are needed and the
+    game log only when history is; after that memory is authoritative and
+    recording a game is an append plus a summary replace.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._summary = None
+        self._games = None
+        self._aggregates = None
+        self._count = None
+
+    @property
+    def summary(self):
+        if self._summary is None:
+            self._summary = self.store.load_summary()
+        return self._summary
+
+    @property
+    def games(self):
+        if self._games is None:
+            self._games = self.store.load_games()
+        return self._games
+
+    @property
+    def aggregates(self):
+        if self._aggregates is None:
+            data = self.store.load_aggregates()
+            if data is not None:
+                self._aggregates = StatsAggregates(data)
+            else:
+                # First run after an upgrade: build once from history, then persist
+                self._aggregates = StatsAggregates.from_games(self.games)
+                self.store.write_aggregates(self._aggregates.to_dict())
+        return self._aggregates
+
+    def __getitem__(self, key):
+        # Dict-style access kept for callers written against the old stats dict
+        return self.games if key == "games" else self.summary[key]
+
+    def recent(self, count):
+        """The newest `count` games, oldest first"""
+        if count <= 0:
+            return []
+        if self._games is None and hasattr(self.store, "recent"):
+            # Indexed backends can answer without loading the whole history
+            return self.store.recent(count)
+        return self.games[-count:]
+
+    @property
+    def game_count(self):
+        """Games available for browsing (the log can hold fewer than total_games after compaction)"""
+        if self._count is None:
+            self._count = self.store.count_games()
+        return self._count
+
+    def page(self, offset, limit):
+        """A page of history, newest first, read from disk without loading the rest"""
+        if self._games is not None:
+            end = len(self._games) - offset
+            return self._games[max(end - limit, 0):max(end, 0)][::-1]
+        return self.store.load_page(offset, limit)
+
+    def record(self, game):
+        """Add a finished game to the counters, the loaded history and the log"""
+        summary = self.summary
+        summary["total_games"] += 1
+        summary[game_outcome(game)] += 1
+        aggregates = self.aggregates
+        aggregates.add(game)
+        if self._games is not None:
+            self._games.append(game)
+        if self._count is not None:
+            self._count += 1
+        self.store.append(game, summary, aggregates.to_dict())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Game statistics maintenance")
+    parser.add_argument("command", choices=["compact", "migrate"])
+    parser.add_argument("--log", default=DEFAULT_LOG, help="game log path")
+    parser.add_argument("--db", default=DEFAULT_DB, help="SQLite database path (migrate)")
+    parser.add_argument("--keep", type=int, default=None, help="keep only the newest N games")
+    args = parser.parse_args()
+
+    if args.command == "compact":
+        kept = StatsStore(args.log).compact(args.keep)
+        print(f"Compacted {args.log}: {kept} games kept")
+    elif args.command == "migrate":
+        db = SqliteStatsStore(args.db)
+        if db.is_migrated():
+            parser.error(f"{args.db} already holds migrated games")
+        db.migrate(StatsStore(args.log))
+        print(f"Migrated {db.load_summary()['total_games']} games from {args.log} to {args.db}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
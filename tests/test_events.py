@@ -0,0 +1,59 @@
+import os
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pygame  # noqa: E402
+import pytest  # noqa: E402
+
+from penalty_shootout import PenaltyShootout, MENU, STATS, HISTORY_PAGE_SIZE  # noqa: E402
+
+
+@pytest.fixture
+def game(tmp_path, monkeypatch):
+    # Stats, settings and the sprite cache are written to the working directory
+    monkeypatch.chdir(tmp_path)
+    os.symlink(os.path.join(ROOT, "assets"), "assets")
+    game = PenaltyShootout(seed=0)
+    yield game
+    game.settings_writer.close()
+
+
+def wheel_notch(pos, up=False):
+    """What pygame 2 posts for one wheel notch: a MOUSEWHEEL and a button 4/5 press"""
+    return [pygame.event.Event(pygame.MOUSEWHEEL, x=0, y=1 if up else -1),
+            pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=4 if up else 5, pos=pos)]
+
+
+def test_wheel_over_stats_buttons_only_scrolls_one_row(game, monkeypatch):
+    monkeypatch.setattr(type(game.stats), "game_count", property(lambda self: 100))
+    game.state = STATS
+    older = game.layout.stats["older"].rect.center
+    game.handle_events(wheel_notch(older))
+    assert game.history_offset == 1  # one row, not a row plus a page
+
+    game.handle_events([pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1, pos=older)])
+    assert game.history_offset == 1 + HISTORY_PAGE_SIZE
+
+    back = game.layout.stats["back"].rect.center
+    game.handle_events(wheel_notch(back, up=True))
+    assert game.state == STATS
+    assert game.history_offset == HISTORY_PAGE_SIZE
+
+
+def test_left_click_still_presses_buttons(game):
+    game.state = STATS
+    game.handle_events([pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1,
+                                           pos=game.layout.stats["back"].rect.center)])
+    assert game.state == MENU
+
+
+def test_right_click_on_menu_does_nothing(game):
+    game.state = MENU
+    game.handle_events([pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=3,
+                                           pos=game.layout.menu["settings"].rect.center)])
+    assert game.state == MENU
@@ -0,0 +1,56 @@
+"""Precomputed ball flight paths.
+
+A shot's path depends only on where it starts, where it is aimed and its
+power, so each (start, target, quantized power) path is computed once into
+a flat array('f') of x, y pairs, one pair per simulation step. Animating
+the ball is then an index into the table, and the path always runs from
+the spot to the target instead of drifting with the ball's last position.
+"""
+import math
+from array import array
+
+POWER_STEPS = 100   # powers are quantized to 1/POWER_STEPS
+BASE_STEPS = 60     # steps in flight at power 0.5
+MAX_ARC = 150       # arc height in pixels at power 0
+
+
+def quantize(power):
+    return round(power * POWER_STEPS)
+
+
+def flight_steps(level):
+    """Steps the ball is in the air for quantized power `level`"""
+    speed_factor = 0.5 + level / POWER_STEPS  # 0.5 (weak) → 1.5 (strong)
+    return int(BASE_STEPS / speed_factor)
+
+
+def build_trajectory(start, target, level):
+    """Ball positions for steps 1..flight_steps(level) as a flat x, y array"""
+    power = level / POWER_STEPS
+    duration = BASE_STEPS / (0.5 + power)
+    arc_height = MAX_ARC * (1 - power)  # more arc at low power
+    dx = target[0] - start[0]
+    dy = target[1] - start[1]
+    path = array("f")
+    for step in range(1, flight_steps(level) + 1):
+        progress = step / duration
+        path.append(start[0] + dx * progress)
+        path.append(start[1] - arc_height * math.sin(progress * math.pi) + dy * progress)
+    return path
+
+
+class TrajectoryTable:
+    """Lazily built, cached paths keyed by (start, target, quantized power)"""
+
+    def __init__(self):
+        self.paths = {}
+
+    def get(self, start, target, power):
+        key = (tuple(start), tuple(target), quantize(power))
+        path = self.paths.get(key)
+        if path is None:
+            path = self.paths[key] = build_trajectory(key[0], key[1], key[2])
+        return path
+
+    def clear(self):
+        self.paths.clear()